@@ -1,8 +1,23 @@
 import search
 import random
+import os
+import mmap
+from array import array
+from collections import deque
 
 # Module Classes
 
+_goalPackings = {}
+
+def goalPacking(size):
+    "Returns the packed goal configuration (blank first, then 1, 2, ...)."
+    if size not in _goalPackings:
+        packed = 0
+        for index in range(size * size):
+            packed |= index << (4 * index)
+        _goalPackings[size] = packed
+    return _goalPackings[size]
+
 class EightPuzzleState:
     """
     The Eight Puzzle is described in the course textbook on
@@ -11,7 +26,13 @@ class EightPuzzleState:
     This class defines the mechanics of the puzzle itself.  The
     task of recasting this puzzle as a search problem is left to
     the EightPuzzleSearchProblem class.
+
+    The same class handles larger square puzzles such as the fifteen
+    puzzle.  The whole board is packed into a single integer 'packed', four
+    bits per cell in row-major order, so copying, hashing and comparing
+    puzzles never touches a list.
     """
+    __slots__ = ('size', 'packed', 'blank')
 
     def __init__( self, numbers ):
         """
@@ -32,18 +53,38 @@ class EightPuzzleState:
             | 6 | 7 | 8 |
             ------------
 
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        A list of 16 numbers from 0 to 15 gives a fifteen puzzle.  The
+        configuration can be read back as a 2-dimensional list (a list of
+        lists) 'cells'.
         """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range( 3 ):
-            self.cells.append( [] )
-            for col in range( 3 ):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+        self.size = int(round(len(numbers) ** 0.5))
+        if self.size * self.size != len(numbers) or self.size > 4:
+            raise Exception('Puzzles must be square with at most 16 cells')
+        self.packed = 0
+        for index, number in enumerate(numbers):
+            self.packed |= number << (4 * index)
+            if number == 0:
+                self.blank = index
+
+    @classmethod
+    def fromPacked(cls, size, packed, blank):
+        "Builds a puzzle directly from its packed representation."
+        puzzle = cls.__new__(cls)
+        puzzle.size, puzzle.packed, puzzle.blank = size, packed, blank
+        return puzzle
+
+    def tileAt(self, index):
+        "Returns the number in cell index (row * size + col)."
+        return (self.packed >> (4 * index)) & 15
+
+    @property
+    def cells(self):
+        return [[self.tileAt(row * self.size + col) for col in range(self.size)]
+                for row in range(self.size)]
+
+    @property
+    def blankLocation(self):
+        return divmod(self.blank, self.size)
 
     def isGoal( self ):
         """
@@ -63,13 +104,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
         False
         """
-        current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.packed == goalPacking(self.size)
 
     def legalMoves( self ):
         """
@@ -85,11 +120,11 @@ class EightPuzzleState:
         row, col = self.blankLocation
         if(row != 0):
             moves.append('up')
-        if(row != 2):
+        if(row != self.size - 1):
             moves.append('down')
         if(col != 0):
             moves.append('left')
-        if(col != 2):
+        if(col != self.size - 1):
             moves.append('right')
         return moves
 
@@ -105,31 +140,21 @@ class EightPuzzleState:
         NOTE: This function *does not* change the current object.  Instead,
         it returns a new object.
         """
-        row, col = self.blankLocation
         if(move == 'up'):
-            newrow = row - 1
-            newcol = col
+            target = self.blank - self.size
         elif(move == 'down'):
-            newrow = row + 1
-            newcol = col
+            target = self.blank + self.size
         elif(move == 'left'):
-            newrow = row
-            newcol = col - 1
+            target = self.blank - 1
         elif(move == 'right'):
-            newrow = row
-            newcol = col + 1
+            target = self.blank + 1
         else:
-            raise "Illegal Move"
-
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = newrow, newcol
+            raise Exception("Illegal Move")
 
-        return newPuzzle
+        # Slide the tile at target into the blank; the blank's nibble is 0.
+        tile = self.tileAt(target)
+        packed = self.packed & ~(15 << (4 * target)) | (tile << (4 * self.blank))
+        return EightPuzzleState.fromPacked(self.size, packed, target)
 
     # Utilities for comparison and display
     def __eq__(self, other):
@@ -141,27 +166,25 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return self.size == other.size and self.packed == other.packed
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return hash(self.packed)
 
     def __getAsciiString(self):
         """
           Returns a display string for the maze
         """
         lines = []
-        horizontalLine = ('-' * (13))
+        width = len(str(self.size * self.size - 1))
+        horizontalLine = ('-' * (self.size * (width + 3) + 1))
         lines.append(horizontalLine)
         for row in self.cells:
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = rowLine + ' ' + col.__str__() + ' |'
+                rowLine = rowLine + ' ' + col.__str__().rjust(width) + ' |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
@@ -180,9 +203,10 @@ class EightPuzzleSearchProblem(search.SearchProblem):
     def __init__(self,puzzle):
         "Creates a new EightPuzzleSearchProblem which stores search information."
         self.puzzle = puzzle
+        self.heuristicInfo = {} # A dictionary for the heuristic to store information
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -234,28 +258,184 @@ def loadEightPuzzle(puzzleNumber):
     """
     return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves=100):
+def createRandomEightPuzzle(moves=100, size=3):
     """
       moves: number of random moves to apply
+      size:  the width of the board (4 for a fifteen puzzle)
 
       Creates a random eight puzzle by applying
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = EightPuzzleState(list(range(size * size)))
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+# Pattern databases
+
+# Disjoint tile groups for additive pattern databases, by puzzle size.
+PATTERN_GROUPS = {3: [(1, 2, 4, 5), (3, 6, 7, 8)],
+                  4: [(1, 2, 3, 6, 7), (4, 5, 8, 9, 12), (10, 11, 13, 14, 15)]}
+
+PATTERN_DATABASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patternDatabases')
+
+def _cellNeighbors(size):
+    neighbors = []
+    for index in range(size * size):
+        row, col = divmod(index, size)
+        cells = []
+        if row > 0: cells.append(index - size)
+        if row < size - 1: cells.append(index + size)
+        if col > 0: cells.append(index - 1)
+        if col < size - 1: cells.append(index + 1)
+        neighbors.append(cells)
+    return neighbors
+
+def buildPatternDatabase(size, tiles):
+    """
+    Returns a bytearray holding, for every placement of the given tiles, the
+    least number of moves of those tiles needed to bring them home.  Moves of
+    other tiles are free, so databases over disjoint groups of tiles can be
+    added together and stay admissible.
+
+    A placement is indexed by the cell of each tile in turn, four bits per
+    tile (see patternIndex).  The table is computed by a 0-1 breadth first
+    search backwards from the goal over (placement, blank cell) pairs.
+    """
+    k = len(tiles)
+    neighbors = _cellNeighbors(size)
+    unseen = 255
+    blankShift = 4 * k
+    distance = bytearray([unseen]) * (16 ** (k + 1))
+    closed = bytearray(16 ** (k + 1))
+
+    start = 0
+    for j, tile in enumerate(tiles):
+        start |= tile << (4 * j)
+    distance[start] = 0
+    queue = deque([start])
+    while queue:
+        index = queue.popleft()
+        if closed[index]:
+            continue
+        closed[index] = 1
+        d = distance[index]
+        blank = index >> blankShift
+        occupied = {}
+        for j in range(k):
+            occupied[(index >> (4 * j)) & 15] = j
+        for cell in neighbors[blank]:
+            if cell in occupied:
+                # Slide pattern tile j from cell into the blank: costs one move.
+                shift = 4 * occupied[cell]
+                nextIndex = (index & ~(15 << shift) | (blank << shift)) & ~(15 << blankShift) | (cell << blankShift)
+                if d + 1 < distance[nextIndex]:
+                    distance[nextIndex] = d + 1
+                    queue.append(nextIndex)
+            else:
+                nextIndex = index & ~(15 << blankShift) | (cell << blankShift)
+                if d < distance[nextIndex]:
+                    distance[nextIndex] = d
+                    queue.appendleft(nextIndex)
+
+    # The heuristic cannot see where the blank is, so take the best case.
+    table = bytearray([unseen]) * (16 ** k)
+    mask = 16 ** k - 1
+    for index in range(len(distance)):
+        d = distance[index]
+        if d < table[index & mask]:
+            table[index & mask] = d
+    return table
+
+def patternDatabaseFile(size, tiles):
+    name = 'puzzle%d_%s.pdb' % (size * size - 1, '-'.join([str(tile) for tile in tiles]))
+    return os.path.join(PATTERN_DATABASE_DIR, name)
+
+def loadPatternDatabase(size, tiles):
+    """
+    Returns the pattern database for the given tiles as a read-only memory
+    map of the file written by the first build, building it if needed.
+    Processes loading the same database share one copy in the page cache.
+    """
+    path = patternDatabaseFile(size, tiles)
+    if not os.path.exists(path):
+        print('Building pattern database for tiles %s...' % str(tiles))
+        table = buildPatternDatabase(size, tiles)
+        if not os.path.isdir(PATTERN_DATABASE_DIR):
+            os.makedirs(PATTERN_DATABASE_DIR)
+        temp = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp, 'wb') as f:
+            f.write(table)
+        os.replace(temp, path)
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def patternIndex(positions, tiles):
+    "Returns the database index of the cells holding the given tiles."
+    index = 0
+    for j, tile in enumerate(tiles):
+        index |= positions[tile] << (4 * j)
+    return index
+
+def patternDatabaseHeuristic(state, problem):
+    """
+    Additive pattern database heuristic for EightPuzzleSearchProblem, using
+    the tile groups in PATTERN_GROUPS.  Admissible and consistent.
+    """
+    info = problem.heuristicInfo
+    if 'patternDatabases' not in info:
+        groups = PATTERN_GROUPS[state.size]
+        info['patternDatabases'] = [(tiles, loadPatternDatabase(state.size, tiles)) for tiles in groups]
+
+    positions = array('B', bytes(state.size * state.size))
+    packed = state.packed
+    for index in range(state.size * state.size):
+        positions[packed & 15] = index
+        packed >>= 4
+    h = 0
+    for tiles, table in info['patternDatabases']:
+        h += table[patternIndex(positions, tiles)]
+    return h
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python eightpuzzle.py <options>')
+    parser.add_option('-s', '--size', dest='size', type='int', default=3,
+                      help='the SIZE of the board: 3 for the eight puzzle, 4 for the fifteen puzzle')
+    parser.add_option('-m', '--moves', dest='moves', type='int', default=25,
+                      help='the number of random MOVES used to scramble the puzzle')
+    parser.add_option('-f', '--fn', dest='fn', default='breadthFirstSearch',
+                      help='the search function from search.py to use')
+    parser.add_option('--pdb', dest='pdb', action='store_true', default=False,
+                      help='use the pattern database heuristic')
+    parser.add_option('-q', '--quiet', dest='quiet', action='store_true', default=False,
+                      help='do not step through the solution')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
 if __name__ == '__main__':
-    puzzle = createRandomEightPuzzle(25)
+    import sys
+    import time
+    options = readCommand(sys.argv[1:])
+    puzzle = createRandomEightPuzzle(options.moves, options.size)
     print('A random puzzle:')
     print(puzzle)
 
     problem = EightPuzzleSearchProblem(puzzle)
-    path = search.breadthFirstSearch(problem)
-    print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    fn = getattr(search, options.fn)
+    starttime = time.time()
+    if options.pdb:
+        path = fn(problem, heuristic=patternDatabaseHeuristic)
+    else:
+        path = fn(problem)
+    print('%s found a path of %d moves in %.1f seconds: %s' %
+          (options.fn, len(path), time.time() - starttime, str(path)))
+    if options.quiet:
+        sys.exit(0)
     curr = puzzle
     i = 1
     for a in path:
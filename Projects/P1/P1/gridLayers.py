@@ -0,0 +1,174 @@
+# gridLayers.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Breadth first search over a wall grid a whole layer at a time.
+
+A set of cells is held as one Python integer, with bit x*height+y standing
+for cell (x, y), the numbering Grid uses.  The next BFS layer is then four
+shifts of the current one, masked by the open cells and the cells already
+seen, so each layer costs a handful of integer operations however many
+cells it holds.  This suits reachability, flood fills and distance queries
+where the search is not interested in individual paths.
+
+Distance maps are assembled with the same trick: each bit of the distance
+is collected as a mask over all cells, and the masks are widened into
+32-bit lanes of one integer and added, so no Python code runs per cell.
+
+> python gridLayers.py -s 1000     # time a distance map on a random board
+"""
+
+import sys
+from array import array
+
+class GridLayers:
+    """
+    The open cells of a walls Grid, with BFS layer operations on cell masks.
+    """
+    def __init__(self, walls):
+        self.width, self.height = walls.width, walls.height
+        height, size = self.height, self.width * self.height
+        columns = [''.join('0' if wall else '1' for wall in reversed(column)) for column in walls.data]
+        self.size = size
+        self.all = (1 << size) - 1
+        self.open = int(''.join(reversed(columns)), 2) if size else 0
+        # Cells that may step north (y + 1) or south (y - 1) without leaving their column
+        self.northOk = self.open & ~int(('1' + '0' * (height - 1)) * self.width, 2)
+        self.southOk = self.open & ~int(('0' * (height - 1) + '1') * self.width, 2)
+
+    def cell(self, pos):
+        return pos[0] * self.height + pos[1]
+
+    def position(self, cell):
+        return divmod(cell, self.height)
+
+    def mask(self, positions):
+        "Returns the mask of a collection of positions."
+        mask = 0
+        for pos in positions:
+            mask |= 1 << self.cell(pos)
+        return mask
+
+    def positions(self, mask):
+        "Returns the positions in mask, in cell order."
+        bits = bin(mask)[:1:-1]
+        cells, i = [], bits.find('1')
+        while i >= 0:
+            cells.append(self.position(i))
+            i = bits.find('1', i + 1)
+        return cells
+
+    def expand(self, frontier):
+        "Returns the mask of open cells one step from a cell in frontier."
+        height = self.height
+        return ((frontier & self.northOk) << 1 | (frontier & self.southOk) >> 1 |
+                frontier << height | frontier >> height) & self.open
+
+    def layers(self, sources):
+        """
+        Yields the BFS layers from sources (a position or a mask): the mask
+        of cells at distance 0, 1, 2, ... until no new cell is reached.
+        """
+        frontier = sources if isinstance(sources, int) else 1 << self.cell(sources)
+        frontier &= self.open
+        unseen = self.open ^ frontier
+        northOk, southOk, height = self.northOk, self.southOk, self.height
+        while frontier:
+            yield frontier
+            frontier = ((frontier & northOk) << 1 | (frontier & southOk) >> 1 |
+                        frontier << height | frontier >> height) & unseen
+            unseen ^= frontier
+
+    def reachable(self, sources):
+        "Returns the mask of cells reachable from sources."
+        seen = 0
+        for layer in self.layers(sources):
+            seen |= layer
+        return seen
+
+    def distance(self, sources, targets):
+        """
+        Returns the maze distance from sources to the nearest of targets
+        (positions or masks), or None if none of them can be reached.
+        """
+        if not isinstance(targets, int):
+            targets = self.mask([targets]) if isinstance(targets, tuple) else self.mask(targets)
+        for d, layer in enumerate(self.layers(sources)):
+            if layer & targets:
+                return d
+        return None
+
+    def distanceMap(self, sources):
+        """
+        Returns an array('i') holding, at index x*height+y, the maze distance
+        of (x, y) from sources, or -1 for walls and unreachable cells.
+        """
+        planes, seen = [], 0
+        for d, layer in enumerate(self.layers(sources)):
+            seen |= layer
+            bit = 0
+            while d:
+                if bit == len(planes):
+                    planes.append(0)
+                if d & 1:
+                    planes[bit] |= layer
+                d >>= 1
+                bit += 1
+
+        lanes = self._widen(self.all & ~seen, b'\xff\xff\xff\xff')
+        for bit, plane in enumerate(planes):
+            lanes += self._widen(plane, b'\x01\x00\x00\x00') << bit
+        distances = array('i')
+        distances.frombytes(lanes.to_bytes(4 * self.size, 'little'))
+        if sys.byteorder == 'big':
+            distances.byteswap()
+        return distances
+
+    def _widen(self, mask, one):
+        "Spreads the bits of mask into 32-bit lanes, with lane value one for a set bit."
+        bits = format(mask, '0%db' % self.size)[::-1].encode() if self.size else b''
+        return int.from_bytes(bits.replace(b'0', b'\x00\x00\x00\x00').replace(b'1', one), 'little')
+
+def randomWalls(size, density=0.25, seed=0):
+    "Returns a size x size walls Grid with a border and random interior walls."
+    import random
+    from game import Grid
+    rand = random.Random(seed)
+    walls = Grid(size, size)
+    for x in range(size):
+        for y in range(size):
+            walls[x][y] = x in (0, size - 1) or y in (0, size - 1) or rand.random() < density
+    walls[1][1] = False
+    return walls
+
+if __name__ == '__main__':
+    import time
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python gridLayers.py <options>')
+    parser.add_option('-s', '--size', dest='size', type='int', default=1000,
+                      help='side of the random board')
+    parser.add_option('-d', '--density', dest='density', type='float', default=0.25,
+                      help='fraction of interior cells that are walls')
+    options, otherjunk = parser.parse_args(sys.argv[1:])
+
+    walls = randomWalls(options.size, options.density)
+    starttime = time.time()
+    grid = GridLayers(walls)
+    print('Masks built in %.3f seconds' % (time.time() - starttime))
+    starttime = time.time()
+    reached = grid.reachable((1, 1))
+    print('Flood fill: %d cells in %.3f seconds' % (bin(reached).count('1'), time.time() - starttime))
+    starttime = time.time()
+    distances = grid.distanceMap((1, 1))
+    print('Distance map: farthest cell at %d in %.3f seconds' % (max(distances), time.time() - starttime))
@@ -0,0 +1,284 @@
+# parallelSearch.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Hash distributed A* (HDA*, Kishimoto, Fukunaga & Botea 2009).
+
+Every search state is owned by one worker process, chosen by hashing the
+state.  A worker keeps the open list and best g values of the states it owns
+only, and expands its best nodes continuously.  Successors owned by other
+workers are batched and put straight into their owners' inboxes; a worker
+takes in whatever has arrived every BATCH_EXPANSIONS expansions.
+
+Each worker publishes the lowest f on its open list and only expands while
+no other worker's is lower, waiting for messages otherwise; this keeps it
+out of f layers a serial A* would never expand, without rounds.  Batches
+in flight can still let nodes be expanded out of order, so workers reopen
+states reached again with a lower g, and a goal only becomes the incumbent
+solution; a worker has nothing left to do once its lowest f reaches the
+incumbent cost.
+
+The search stops when every worker is idle and every batch sent has been
+received.  Workers count the batches they send and receive and mark
+themselves idle under one lock, so the coordinating process sees all of it
+at once and never stops while a batch is in flight.  With an admissible
+heuristic the incumbent is then optimal.
+
+The problem and heuristic are inherited by forked workers.  Where fork is
+not available they are pickled, and states must hash the same way in every
+process (set PYTHONHASHSEED for states built from strings).
+
+To measure scaling on a food search layout:
+
+> python parallelSearch.py -l tinySearch -w 4
+"""
+
+import heapq
+import multiprocessing
+import queue
+import time
+
+BATCH_EXPANSIONS = 32
+
+# Seconds the coordinator waits for a message before checking for termination
+POLL_INTERVAL = 0.005
+
+# Slots of the shared counts array
+SENT, RECEIVED, GOAL_OWNER = 0, 1, 2
+
+def _context():
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+def _worker(index, problem, heuristic, inboxes, results, lock, counts, idle, frontier, incumbent):
+    try:
+        _search(index, problem, heuristic, inboxes, results, lock, counts, idle, frontier, incumbent)
+    except Exception:
+        import traceback
+        results.put(('error', 'HDA* worker %d failed:\n%s' % (index, traceback.format_exc())))
+
+def _search(index, problem, heuristic, inboxes, results, lock, counts, idle, frontier, incumbent):
+    infinity = float('inf')
+    numWorkers = len(inboxes)
+    inbox = inboxes[index]
+    heap, best, parents = [], {}, {}
+    outboxes = [[] for i in range(numWorkers)]
+    goal, expanded, count = None, 0, 0
+
+    def insert(state, g, parent, action):
+        if g < best.get(state, infinity):
+            best[state] = g
+            parents[state] = (parent, action)
+            heapq.heappush(heap, (g + heuristic(state, problem), -g, count, state))
+
+    def send():
+        for owner, outbox in enumerate(outboxes):
+            if outbox:
+                with lock:
+                    counts[SENT] += 1
+                inboxes[owner].put(('states', outbox))
+                outboxes[owner] = []
+
+    while True:
+        while heap and -heap[0][1] > best[heap[0][3]]:
+            heapq.heappop(heap)
+        lowest = heap[0][0] if heap else infinity
+        frontier[index] = lowest
+        bound = min(frontier)
+        working = lowest < incumbent[0]
+        if not (working and lowest <= bound):
+            # Others may be waiting for these successors to catch up.
+            send()
+        if not working:
+            with lock:
+                idle[index] = 1
+        try:
+            if not working:
+                message = inbox.get()
+            elif lowest > bound:
+                message = inbox.get(timeout=POLL_INTERVAL)
+            else:
+                message = inbox.get_nowait()
+        except queue.Empty:
+            message = None
+
+        if message is None:
+            if not working or lowest > bound:
+                continue
+            # Expand while ahead of no other worker and below the incumbent.
+            for i in range(BATCH_EXPANSIONS):
+                if not heap or heap[0][0] > bound or heap[0][0] >= incumbent[0]:
+                    break
+                f, g, _, state = heapq.heappop(heap)
+                g = -g
+                if g > best[state]:
+                    continue
+                if problem.isGoalState(state):
+                    with lock:
+                        if g < incumbent[0]:
+                            incumbent[0], counts[GOAL_OWNER] = g, index
+                            goal = (g, state)
+                    continue
+                expanded += 1
+                for action, stepCost, nextState in problem.getSuccessors(state):
+                    owner = hash(nextState) % numWorkers
+                    count += 1
+                    if owner == index:
+                        insert(nextState, g + stepCost, state, action)
+                    else:
+                        outboxes[owner].append((nextState, g + stepCost, state, action))
+            send()
+        elif message[0] == 'states':
+            with lock:
+                counts[RECEIVED] += 1
+                idle[index] = 0
+            for state, g, parent, action in message[1]:
+                count += 1
+                insert(state, g, parent, action)
+        elif message[0] == 'finish':
+            results.put(('reply', (expanded, goal and goal[1])))
+        elif message[0] == 'parent':
+            results.put(('reply', parents.get(message[1])))
+        else:
+            return
+
+def hashDistributedAStarSearch(problem, heuristic, numWorkers=None):
+    """
+    Runs HDA* with numWorkers processes (default: one per CPU) and returns
+    an optimal list of actions, or [] if the goal is unreachable.  The
+    expansions of all workers are added to problem._expanded when the
+    problem keeps that counter.
+    """
+    context = _context()
+    numWorkers = int(numWorkers or context.cpu_count())
+    inboxes = [context.Queue() for i in range(numWorkers)]
+    results = context.Queue()
+    lock = context.Lock()
+    counts = context.RawArray('q', [0, 0, -1])
+    idle = context.RawArray('b', numWorkers)
+    frontier = context.RawArray('d', [float('inf')] * numWorkers)
+    incumbent = context.RawArray('d', [float('inf')])
+    workers = []
+    for index in range(numWorkers):
+        worker = context.Process(target=_worker, args=(index, problem, heuristic, inboxes, results,
+                                                       lock, counts, idle, frontier, incumbent))
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+
+    def receive(block=True):
+        # Returns the next reply from a worker, raising the error of a failed one.
+        while True:
+            try:
+                tag, payload = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                for worker in workers:
+                    if not worker.is_alive():
+                        raise Exception('HDA* worker exited with code %s' % worker.exitcode)
+                if not block:
+                    return None
+                continue
+            if tag == 'error':
+                raise Exception(payload)
+            return payload
+
+    try:
+        start = problem.getStartState()
+        with lock:
+            counts[SENT] += 1
+        inboxes[hash(start) % numWorkers].put(('states', [(start, 0, None, None)]))
+        while True:
+            receive(block=False)
+            with lock:
+                if all(idle) and counts[SENT] == counts[RECEIVED]:
+                    break
+
+        expanded, goalState = 0, None
+        for index, inbox in enumerate(inboxes):
+            inbox.put(('finish',))
+            workerExpanded, workerGoal = receive()
+            expanded += workerExpanded
+            if index == counts[GOAL_OWNER]:
+                goalState = workerGoal
+        if '_expanded' in dir(problem):
+            problem._expanded += expanded
+        if goalState is None:
+            return []
+
+        # Follow the parent links back to the start, asking each owner in turn.
+        actions, state = [], goalState
+        while True:
+            inboxes[hash(state) % numWorkers].put(('parent', state))
+            state, action = receive()
+            if state is None:
+                break
+            actions.append(action)
+        actions.reverse()
+        return actions
+    finally:
+        # Workers that failed may have closed their end; keep the error that
+        # brought us here rather than one from shutting down.
+        for inbox in inboxes:
+            try:
+                inbox.put(('stop',))
+            except (OSError, ValueError):
+                pass
+        for worker in workers:
+            worker.join(1)
+            if worker.is_alive():
+                worker.terminate()
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python parallelSearch.py <options>')
+    parser.add_option('-l', '--layout', dest='layout', default='tinySearch',
+                      help='the food search LAYOUT to solve', metavar='LAYOUT')
+    parser.add_option('-w', '--workers', dest='workers', type='int', default=4,
+                      help='measure 1 to WORKERS worker processes')
+    parser.add_option('--heuristic', dest='heuristic', default='nullHeuristic',
+                      help='a heuristic from searchAgents.py or search.py')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+if __name__ == '__main__':
+    import sys
+    import layout
+    import pacman
+    import search
+    import searchAgents
+
+    options = readCommand(sys.argv[1:])
+    gameState = pacman.GameState()
+    gameState.initialize(layout.getLayout(options.layout), 0)
+    if options.heuristic in dir(searchAgents):
+        heuristic = getattr(searchAgents, options.heuristic)
+    else:
+        heuristic = getattr(search, options.heuristic)
+
+    problem = searchAgents.FoodSearchProblem(gameState)
+    starttime = time.time()
+    path = search.aStarSearch(problem, heuristic)
+    print('%-10s cost %4d  expanded %8d  %7.2fs' % ('A*', len(path), problem._expanded, time.time() - starttime))
+    single = None
+    for numWorkers in range(1, options.workers + 1):
+        problem = searchAgents.FoodSearchProblem(gameState)
+        starttime = time.time()
+        path = hashDistributedAStarSearch(problem, heuristic, numWorkers)
+        elapsed = time.time() - starttime
+        single = single or elapsed
+        print('HDA* x%-4d cost %4d  expanded %8d  %7.2fs  speedup over x1 %.2f' %
+              (numWorkers, len(path), problem._expanded, elapsed, single / elapsed))
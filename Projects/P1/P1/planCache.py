@@ -0,0 +1,110 @@
+# planCache.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A persistent cache of search plans, shared by every agent and process that
+uses the same cache directory.
+
+A plan is stored under a key made from the board (walls, food and capsules),
+the problem type, its start state and goals, and the names of the search
+function and heuristic.  Plans are stored one per file, one character per
+action.
+
+Every key also includes a hash of the source of search.py and
+searchAgents.py, so editing either file invalidates all plans found before
+the edit; stale plans are deleted the first time the cache is opened after
+the change.  Use CachedSearchAgent to plan through the cache:
+
+> python pacman.py -l bigMaze -z .5 -p CachedSearchAgent -a fn=astar,heuristic=manhattanHeuristic
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+from game import Directions
+
+PLAN_CACHE_DIR = 'planCache'
+
+_ACTION_CODES = {Directions.NORTH: 'N', Directions.SOUTH: 'S', Directions.EAST: 'E',
+                 Directions.WEST: 'W', Directions.STOP: 'X'}
+_CODE_ACTIONS = dict((code, action) for action, code in _ACTION_CODES.items())
+
+def sourceVersion(modules):
+    "Returns a hash of the source files of modules."
+    digest = hashlib.sha1()
+    for module in modules:
+        with open(os.path.splitext(module.__file__)[0] + '.py', 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+# Names of the version subdirectories made by sourceVersion
+_VERSION_NAME = re.compile('^[0-9a-f]{16}$')
+
+def problemGoals(problem):
+    "Returns the goals a problem was built with, for the problems in searchAgents.py."
+    return tuple((name, getattr(problem, name)) for name in ['goal', 'corners', 'foodPositions']
+                 if hasattr(problem, name))
+
+class PlanCache:
+    """
+    Action lists on disk under directory, one subdirectory per source
+    version.  Writes are atomic, so several processes can share a cache.
+    Only subdirectories named like a version are ever deleted, so the cache
+    may live in a directory holding other files.
+    """
+    def __init__(self, directory=PLAN_CACHE_DIR, version=None):
+        if version is None:
+            import search
+            import searchAgents
+            version = sourceVersion([search, searchAgents])
+        self.directory = directory
+        self.path = os.path.join(directory, version)
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, exist_ok=True)
+            for name in os.listdir(directory):
+                if name != version and _VERSION_NAME.match(name):
+                    shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    def key(self, gameState, problem, algorithm, heuristic=None):
+        "Returns the key of a plan for problem, which was built from gameState."
+        parts = [str(gameState.getWalls()), str(gameState.getFood()), sorted(gameState.getCapsules()),
+                 type(problem).__name__, problem.getStartState(), problemGoals(problem),
+                 algorithm, heuristic]
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def get(self, key):
+        "Returns the plan stored under key, or None."
+        try:
+            with open(os.path.join(self.path, key)) as f:
+                return [_CODE_ACTIONS[code] for code in f.read()]
+        except (IOError, KeyError):
+            return None
+
+    def put(self, key, actions):
+        "Stores actions under key.  The plan is dropped if another process clears the cache meanwhile."
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(handle, 'w') as f:
+                f.write(''.join(_ACTION_CODES[action] for action in actions))
+            os.replace(temporary, os.path.join(self.path, key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path, exist_ok=True)
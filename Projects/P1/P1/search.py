@@ -17,6 +17,7 @@ In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
 
+import heapq
 import util
 
 class SearchProblem:
@@ -185,9 +186,494 @@ def aStarSearch(problem, heuristic=nullHeuristic):
 
     util.raiseNotDefined()
 
+def iterativeDeepeningAStarSearch(problem, heuristic=nullHeuristic):
+    """
+    Depth-first search bounded by f = g + h, restarted with the smallest f
+    that exceeded the previous bound.  Only the current path is kept in
+    memory, so the space used is linear in the solution depth.  With an
+    admissible heuristic the first solution found is optimal.
+    """
+    start = problem.getStartState()
+    bound = heuristic(start, problem)
+
+    while True:
+        path, onPath = [], [start]
+        # Each frame is (state, g, unexpanded successors).
+        stack = [(start, 0, None)]
+        nextBound = float('inf')
+        while stack:
+            state, g, successors = stack[-1]
+            if successors is None:
+                f = g + heuristic(state, problem)
+                if f > bound:
+                    nextBound = min(nextBound, f)
+                    stack.pop()
+                    onPath.pop()
+                    if path: path.pop()
+                    continue
+                if problem.isGoalState(state):
+                    return path
+                successors = iter(problem.getSuccessors(state))
+                stack[-1] = (state, g, successors)
+
+            for action, stepCost, nextState in successors:
+                if nextState not in onPath:
+                    onPath.append(nextState)
+                    path.append(action)
+                    stack.append((nextState, g + stepCost, None))
+                    break
+            else:
+                stack.pop()
+                onPath.pop()
+                if path: path.pop()
+
+        if nextBound == float('inf'):
+            return []
+        bound = nextBound
+
+class _SMANode:
+    "A node of the search tree kept in memory by smaStarSearch."
+    def __init__(self, state, parent, action, g, f, depth, serial):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.g = g
+        self.f = f
+        self.depth = depth
+        self.serial = serial    # Creation order, used to break ties
+        # One slot per successor once expanded: None if not generated yet,
+        # the child if it is in memory, or the child's f if it was forgotten.
+        self.successors = None
+        self.slots = None
+        self.numChildren = 0
+        self.version = 0        # Bumped whenever heap entries go stale
+        self.inMemory = True
+
+    def pendingF(self):
+        "The lowest f among the successors that are not in memory."
+        pending = float('inf')
+        for slot in self.slots:
+            if slot is None:
+                pending = min(pending, self.f)
+            elif not isinstance(slot, _SMANode):
+                pending = min(pending, slot)
+        return pending
+
+    def path(self):
+        actions = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse()
+        return actions
+
+    def ancestorStates(self):
+        node, states = self, set()
+        while node is not None:
+            states.add(node.state)
+            node = node.parent
+        return states
+
+SMA_MAX_NODES = 100000
+
+def smaStarSearch(problem, heuristic=nullHeuristic, maxNodes=SMA_MAX_NODES):
+    """
+    Simplified memory-bounded A*.  Each step takes the open node with the
+    lowest f (the deepest, then the newest, on ties) and generates one of
+    its successors.  When maxNodes search nodes are in memory the shallowest
+    leaf with the highest f (the oldest on ties) is dropped first; its f is
+    backed up into its parent, which regenerates it if the forgotten branch
+    becomes the most promising again.  Nodes on the path being extended are
+    never dropped.
+
+    Only states already on a node's own path are pruned; a state reached
+    along different paths is searched under each, as in a tree search.  With
+    an admissible heuristic the solution is optimal if the optimal path,
+    counting the start, has at most maxNodes nodes, and the search
+    terminates: it returns [] once every remaining path is longer than that.
+    """
+    maxNodes = int(maxNodes)
+    if maxNodes < 1:
+        return []
+    infinity = float('inf')
+    serial = [0]
+    best, worst = [], []   # Min-heap over open nodes, max-heap over leaves
+
+    def newNode(state, parent, action, g, f, depth):
+        serial[0] += 1
+        return _SMANode(state, parent, action, g, f, depth, serial[0])
+
+    def update(node):
+        # Nodes with successors outside memory are open; nodes without
+        # children in memory are leaves that may be dropped.
+        node.version += 1
+        key = node.f if node.slots is None else node.pendingF()
+        if key < infinity:
+            heapq.heappush(best, (key, -node.depth, -node.serial, node.version, node))
+        if node.numChildren == 0 and node.parent is not None:
+            heapq.heappush(worst, (-node.f, node.depth, node.serial, node.version, node))
+
+    def valid(entry):
+        node = entry[-1]
+        return node.inMemory and entry[3] == node.version
+
+    def backup(node):
+        # Once every successor has been generated, a node's f is the lowest
+        # f of its successors; propagate changes upwards.
+        while node is not None and None not in node.slots:
+            f = min([slot.f if isinstance(slot, _SMANode) else slot for slot in node.slots] or [infinity])
+            if f == node.f:
+                break
+            node.f = f
+            update(node)
+            node = node.parent
+
+    def forget(current):
+        # Drop the shallowest worst leaf other than current, the only leaf
+        # that can lie on the path being extended.
+        kept = None
+        while worst:
+            entry = heapq.heappop(worst)
+            victim = entry[-1]
+            if not valid(entry) or victim.numChildren:
+                continue
+            if victim is current:
+                kept = entry
+                continue
+            break
+        else:
+            victim = None
+        if kept is not None:
+            heapq.heappush(worst, kept)
+        if victim is None:
+            return False
+        victim.inMemory = False
+        parent = victim.parent
+        parent.slots[parent.slots.index(victim)] = victim.f
+        parent.numChildren -= 1
+        update(parent)
+        return True
+
+    start = problem.getStartState()
+    root = newNode(start, None, None, 0, heuristic(start, problem), 0)
+    update(root)
+    used = 1
+
+    while best:
+        entry = heapq.heappop(best)
+        node = entry[-1]
+        if not valid(entry):
+            continue
+        if node.slots is None:
+            if problem.isGoalState(node.state):
+                return node.path()
+            ancestors = node.ancestorStates()
+            node.successors = [successor for successor in problem.getSuccessors(node.state)
+                               if successor[2] not in ancestors]
+            node.slots = [None] * len(node.successors)
+            if not node.slots:
+                node.f = infinity
+                update(node)
+                backup(node.parent)
+                continue
+
+        # Generate the first successor not generated yet, or else regenerate
+        # the forgotten one with the lowest f.
+        if None in node.slots:
+            i = node.slots.index(None)
+        else:
+            i = min([j for j, slot in enumerate(node.slots) if not isinstance(slot, _SMANode)],
+                    key=lambda j: node.slots[j])
+        action, stepCost, nextState = node.successors[i]
+        g = node.g + stepCost
+        if node.depth + 2 >= maxNodes and not problem.isGoalState(nextState):
+            f = infinity    # Its successors could not fit into memory
+        else:
+            f = max(node.f, g + heuristic(nextState, problem))
+        if used >= maxNodes:
+            if not forget(node):
+                return []
+            used -= 1
+        child = newNode(nextState, node, action, g, f, node.depth + 1)
+        node.slots[i] = child
+        node.numChildren += 1
+        used += 1
+        update(child)
+        update(node)
+        backup(node)
+    return []
+
+def araStarSolutions(problem, heuristic=nullHeuristic, weight=3.0, decrement=0.5,
+                     timeLimit=None, maxExpansions=None):
+    """
+    Anytime Repairing A* (Likhachev, Gordon & Thrun 2003).  Runs weighted A*
+    with f = g + weight * h, then lowers the weight and repairs the previous
+    search instead of starting over.  This is a generator yielding a triple
+
+      (actions, cost, bound)
+
+    every time a cheaper plan is found or the bound tightens.  bound is a
+    proven suboptimality factor: no plan costs less than cost / bound.  The
+    last triple has bound 1.0 (optimal) unless the wall-clock timeLimit
+    (seconds) or the maxExpansions budget ran out first.
+    """
+    import time
+    infinity = float('inf')
+    deadline = time.time() + float(timeLimit) if timeLimit is not None else infinity
+    maxExpansions = int(maxExpansions) if maxExpansions is not None else infinity
+    weight, decrement = float(weight), float(decrement)
+
+    start = problem.getStartState()
+    g, parents, h = {start: 0}, {start: None}, {}
+    def estimate(state):
+        if state not in h:
+            h[state] = heuristic(state, problem)
+        return h[state]
+
+    counter = [0]
+    def push(heap, state):
+        counter[0] += 1
+        heapq.heappush(heap, (g[state] + weight * estimate(state), counter[0], g[state], state))
+
+    def planTo(state):
+        actions = []
+        while parents[state] is not None:
+            state, action = parents[state]
+            actions.append(action)
+        actions.reverse()
+        return actions
+
+    frontier, closed, inconsistent = [], set(), set()
+    push(frontier, start)
+    goal, goalCost, expanded = None, infinity, 0
+    lastCost, lastBound = infinity, infinity
+    while True:
+        # Improve the current plan under the current weight.
+        outOfBudget = False
+        while frontier and frontier[0][0] < goalCost:
+            if expanded >= maxExpansions or (expanded % 64 == 0 and time.time() > deadline):
+                outOfBudget = True
+                break
+            _, _, cost, state = heapq.heappop(frontier)
+            if cost != g[state] or state in closed:
+                continue
+            if problem.isGoalState(state):
+                goal, goalCost = state, cost
+                continue
+            closed.add(state)
+            expanded += 1
+            for action, stepCost, nextState in problem.getSuccessors(state):
+                if cost + stepCost < g.get(nextState, infinity):
+                    g[nextState] = cost + stepCost
+                    parents[nextState] = (state, action)
+                    if nextState in closed:
+                        inconsistent.add(nextState)
+                    else:
+                        push(frontier, nextState)
+
+        if goal is None:
+            return
+        # Every plan passes through an open or inconsistent state, so the
+        # least g + h among them bounds the optimal cost from below.  The
+        # weight is a bound too, but only once a pass has run to completion.
+        lowest = min([entry[2] + estimate(entry[3]) for entry in frontier if entry[2] == g[entry[3]]] +
+                     [g[state] + estimate(state) for state in inconsistent] + [goalCost])
+        if lowest > 0:
+            bound = goalCost / lowest
+        else:
+            # Nothing is proven while a plan might still cost nothing.
+            bound = 1.0 if goalCost == 0 else infinity
+        if not outOfBudget:
+            bound = min(bound, weight)
+        if goalCost < lastCost or bound < lastBound:
+            lastCost, lastBound = goalCost, bound
+            yield planTo(goal), goalCost, bound
+        if outOfBudget or bound <= 1.0:
+            return
+
+        # Lower the weight and reopen the states whose g improved after
+        # they were expanded.
+        weight = max(1.0, weight - decrement)
+        states = set([entry[3] for entry in frontier if entry[2] == g[entry[3]] and entry[3] not in closed])
+        states.update(inconsistent)
+        frontier, closed, inconsistent = [], set(), set()
+        for state in states:
+            push(frontier, state)
+
+def anytimeAStarSearch(problem, heuristic=nullHeuristic, timeLimit=1.0, maxExpansions=None, weight=3.0):
+    """
+    Returns the best plan araStarSolutions finds within the budget, or []
+    if it found none.
+    """
+    actions = []
+    for actions, cost, bound in araStarSolutions(problem, heuristic, weight, 0.5, timeLimit, maxExpansions):
+        print('[anytimeAStarSearch] plan of cost %s, within a factor %.3f of optimal' % (str(cost), bound))
+    return actions
+
+def hashDistributedAStarSearch(problem, heuristic=nullHeuristic, numWorkers=None):
+    """
+    A* spread over numWorkers processes (one per CPU by default), each owning
+    the states that hash to it.  The problem and heuristic must be picklable
+    where processes cannot be forked.  See parallelSearch.py.
+    """
+    import parallelSearch
+    return parallelSearch.hashDistributedAStarSearch(problem, heuristic, numWorkers)
+
+class DStarLite:
+    """
+    Incremental planner (D* Lite, Koenig & Likhachev 2002) for an agent that
+    moves through a problem whose goals or step costs change between plans.
+
+    The search runs backwards from the goals, so it keeps its search tree
+    while the start moves and only repairs the part of it affected by a
+    change.  Predecessors are found through getSuccessors, so the moves of
+    the problem must be reversible (true of every maze problem here).  The
+    heuristic takes two states and must not overestimate the cost between
+    them; manhattanDistance does for unit-cost mazes.
+
+    Typical use, once per turn:
+
+      planner.moveTo(newPosition)
+      planner.removeGoal(eatenFood)
+      planner.updateStates(cellsWhoseCostChanged)
+      actions = planner.getPlan()
+    """
+    def __init__(self, problem, goals, heuristic=None):
+        self.problem = problem
+        self.heuristic = heuristic or (lambda state1, state2: 0)
+        self.start = self.last = problem.getStartState()
+        self.km = 0
+        self.g, self.rhs = {}, {}
+        self.goals = set()
+        self.edges = {}       # Cached getSuccessors results
+        self.cachedBy = {}    # state -> states whose cached successors include it
+        self.heap = []
+        self.queued = {}      # state -> key of its live heap entry
+        self.count = 0
+        for goal in goals:
+            self.addGoal(goal)
+
+    def getG(self, state):
+        return self.g.get(state, float('inf'))
+
+    def getRhs(self, state):
+        return self.rhs.get(state, float('inf'))
+
+    def successors(self, state):
+        if state not in self.edges:
+            self.edges[state] = self.problem.getSuccessors(state)
+            for _, _, nextState in self.edges[state]:
+                self.cachedBy.setdefault(nextState, set()).add(state)
+        return self.edges[state]
+
+    def predecessors(self, state):
+        return [nextState for _, _, nextState in self.successors(state)]
+
+    def calculateKey(self, state):
+        m = min(self.getG(state), self.getRhs(state))
+        return (m + self.heuristic(self.start, state) + self.km, m)
+
+    def updateVertex(self, state):
+        if state not in self.goals:
+            rhs = float('inf')
+            for _, stepCost, nextState in self.successors(state):
+                rhs = min(rhs, stepCost + self.getG(nextState))
+            self.rhs[state] = rhs
+        self.queued.pop(state, None)
+        if self.getG(state) != self.getRhs(state):
+            key = self.calculateKey(state)
+            self.queued[state] = key
+            self.count += 1
+            heapq.heappush(self.heap, (key, self.count, state))
+
+    def topKey(self):
+        while self.heap:
+            key, _, state = self.heap[0]
+            if self.queued.get(state) == key:
+                return key
+            heapq.heappop(self.heap)
+        return (float('inf'), float('inf'))
+
+    def computeShortestPath(self):
+        while self.topKey() < self.calculateKey(self.start) or \
+              self.getRhs(self.start) != self.getG(self.start):
+            if not self.heap:
+                break
+            oldKey, _, state = heapq.heappop(self.heap)
+            del self.queued[state]
+            newKey = self.calculateKey(state)
+            if oldKey < newKey:
+                self.queued[state] = newKey
+                self.count += 1
+                heapq.heappush(self.heap, (newKey, self.count, state))
+            elif self.getG(state) > self.getRhs(state):
+                self.g[state] = self.rhs[state]
+                for predecessor in self.predecessors(state):
+                    self.updateVertex(predecessor)
+            else:
+                self.g[state] = float('inf')
+                for predecessor in self.predecessors(state) + [state]:
+                    self.updateVertex(predecessor)
+
+    def moveTo(self, state):
+        "Tells the planner the agent is now at state."
+        self.km += self.heuristic(self.last, state)
+        self.start = self.last = state
+
+    def addGoal(self, goal):
+        self.goals.add(goal)
+        self.rhs[goal] = 0
+        self.updateVertex(goal)
+
+    def removeGoal(self, goal):
+        if goal in self.goals:
+            self.goals.remove(goal)
+            self.updateVertex(goal)
+
+    def updateStates(self, states):
+        """
+        Tells the planner that the cost of moving into or out of any of the
+        given states may have changed.  Their successors are fetched again
+        from the problem.
+        """
+        affected = set()
+        for state in states:
+            # Only states the search has reached can have a finite rhs; the
+            # others pick up the new costs when they are first reached.
+            if self.edges.pop(state, None) is not None:
+                affected.add(state)
+            for neighbor in self.cachedBy.pop(state, []):
+                if self.edges.pop(neighbor, None) is not None:
+                    affected.add(neighbor)
+        for state in affected:
+            self.updateVertex(state)
+
+    def getPlan(self):
+        """
+        Returns the cheapest list of actions from the current start to a goal,
+        or None if no goal is reachable.
+        """
+        self.computeShortestPath()
+        if self.getG(self.start) == float('inf') and self.start not in self.goals:
+            return None
+        actions, state, seen = [], self.start, set([self.start])
+        while state not in self.goals:
+            action, _, state = min(self.successors(state),
+                                   key=lambda successor: successor[1] + self.getG(successor[2]))
+            if state in seen:
+                return None
+            seen.add(state)
+            actions.append(action)
+        return actions
+
 
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+idastar = iterativeDeepeningAStarSearch
+smastar = smaStarSearch
+hdastar = hashDistributedAStarSearch
+araastar = anytimeAStarSearch
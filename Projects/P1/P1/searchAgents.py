@@ -37,6 +37,7 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
+from game import Grid
 import util
 import time
 import search
@@ -133,6 +134,122 @@ class SearchAgent(Agent):
         else:
             return Directions.STOP
 
+def lookupHeuristic(name):
+    "Returns the heuristic called name from searchAgents.py or search.py."
+    if name in globals().keys():
+        return globals()[name]
+    elif name in dir(search):
+        return getattr(search, name)
+    raise AttributeError(name + ' is not a function in searchAgents.py or search.py.')
+
+def lookupProblem(name):
+    "Returns the search problem class called name from searchAgents.py."
+    if name not in globals().keys() or not name.endswith('Problem'):
+        raise AttributeError(name + ' is not a search problem type in SearchAgents.py.')
+    return globals()[name]
+
+class InstrumentedSearchAgent(SearchAgent):
+    """
+    A SearchAgent that records expansions, generated nodes, duplicates, peak
+    frontier, heuristic and successor timing for its search (see
+    searchStats.py) and writes them to statsFile as JSON.  Options are those
+    of SearchAgent plus statsFile, traceMemory and trace:
+
+    > python pacman.py -l trickySearch -p InstrumentedSearchAgent -a fn=astar,prob=FoodSearchProblem,heuristic=foodHeuristic,statsFile=astar.json
+    """
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic',
+                 statsFile='searchStats.json', traceMemory=False, trace=False):
+        SearchAgent.__init__(self, fn, prob, heuristic)
+        # runInstrumented wraps the search function and heuristic separately.
+        self.function = getattr(search, fn)
+        self.heuristic = None
+        if 'heuristic' in self.function.__code__.co_varnames:
+            self.heuristic = lookupHeuristic(heuristic)
+        self.statsFile = statsFile
+        self.traceMemory = traceMemory not in [False, 'False', '0']
+        self.trace = trace not in [False, 'False', '0']
+
+    def registerInitialState(self, state):
+        import searchStats
+        problem = self.searchType(state)
+        self.actions, self.stats = searchStats.runInstrumented(self.function, problem, self.heuristic,
+                                                               self.traceMemory, self.trace)
+        searchStats.writeStats(self.stats, self.statsFile)
+        print('Path found with total cost of %s in %.1f seconds' % (str(self.stats['solutionCost']), self.stats['wallSeconds']))
+        print('Search nodes expanded: %d, generated: %d, duplicates: %d, peak frontier: %d' %
+              (self.stats['expanded'], self.stats['generated'], self.stats['duplicates'], self.stats['peakFrontier']))
+        print('Search statistics written to %s' % self.statsFile)
+
+class CachedSearchAgent(SearchAgent):
+    """
+    A SearchAgent that keeps its plans in a persistent plan cache (see
+    planCache.py), so planning again on the same board and problem with the
+    same search function and heuristic returns the stored plan instead of
+    searching.  Options are those of SearchAgent plus cacheDir:
+
+    > python pacman.py -l bigMaze -z .5 -p CachedSearchAgent -a fn=astar,heuristic=manhattanHeuristic
+    """
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic',
+                 cacheDir='planCache'):
+        SearchAgent.__init__(self, fn, prob, heuristic)
+        self.algorithm = getattr(search, fn).__name__
+        self.heuristicName = None
+        if 'heuristic' in getattr(search, fn).__code__.co_varnames:
+            self.heuristicName = lookupHeuristic(heuristic).__name__
+        self.cacheDir = cacheDir
+
+    def registerInitialState(self, state):
+        import planCache
+        starttime = time.time()
+        cache = planCache.PlanCache(self.cacheDir)
+        problem = self.searchType(state)
+        key = cache.key(state, problem, self.algorithm, self.heuristicName)
+        self.actions = cache.get(key)
+        if self.actions is not None:
+            print('Path found in plan cache with total cost of %d in %.1f seconds' %
+                  (problem.getCostOfActions(self.actions), time.time() - starttime))
+            return
+        self.actions = self.searchFunction(problem)
+        if self.actions is not None:
+            cache.put(key, self.actions)
+        print('Path found with total cost of %d in %.1f seconds' %
+              (problem.getCostOfActions(self.actions), time.time() - starttime))
+        if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+
+class AnytimeSearchAgent(SearchAgent):
+    """
+    A SearchAgent that plans with Anytime Repairing A* (search.araStarSolutions)
+    under a budget, instead of running a search to completion.  Weighted A*
+    finds a first plan quickly and later passes improve it until timeLimit
+    seconds or maxExpansions expansions are used up.
+
+    After registerInitialState, self.actions holds the best plan found and
+    self.bound its proven suboptimality factor (1.0 means optimal).
+
+    > python pacman.py -l mediumSearch -p AnytimeSearchAgent -a timeLimit=5,weight=3
+    """
+    def __init__(self, prob='FoodSearchProblem', heuristic='foodHeuristic',
+                 timeLimit=1.0, maxExpansions=None, weight=3.0):
+        self.heuristic = lookupHeuristic(heuristic)
+        self.searchType = lookupProblem(prob)
+        self.timeLimit = float(timeLimit)
+        self.maxExpansions = maxExpansions
+        self.weight = float(weight)
+
+    def registerInitialState(self, state):
+        starttime = time.time()
+        problem = self.searchType(state)
+        self.actions, self.bound = [], float('inf')
+        solutions = search.araStarSolutions(problem, self.heuristic, self.weight, 0.5,
+                                            self.timeLimit, self.maxExpansions)
+        for actions, cost, bound in solutions:
+            self.actions, self.bound = actions, bound
+            print('Path of cost %s within a factor %.3f of optimal after %.1f seconds' %
+                  (str(cost), bound, time.time() - starttime))
+        if not self.actions:
+            print('No path found within the search budget')
+        if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+
 class PositionSearchProblem(search.SearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
@@ -262,6 +379,40 @@ def euclideanHeuristic(position, problem, info={}):
     xy2 = problem.goal
     return ( (xy1[0] - xy2[0]) ** 2 + (xy1[1] - xy2[1]) ** 2 ) ** 0.5
 
+def cellSuccessorTable(walls):
+    """
+    Returns a list indexed by cell id (x * walls.height + y, the same layout
+    Grid uses for packBits) whose entries are the lists of (action, nextCell)
+    pairs of legal moves out of that cell.  Wall cells get empty lists.
+    """
+    table = []
+    for cell in range(walls.width * walls.height):
+        x, y = cell // walls.height, cell % walls.height
+        moves = []
+        if not walls[x][y]:
+            for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(action)
+                nextx, nexty = int(x + dx), int(y + dy)
+                if not walls[nextx][nexty]:
+                    moves.append((action, nextx * walls.height + nexty))
+        table.append(moves)
+    return table
+
+# The walls the last successor table was built for, and that table
+_successorTable = (None, None)
+
+def layoutSuccessorTable(walls):
+    """
+    Returns cellSuccessorTable(walls), built once per layout: the table is
+    kept until it is asked for with different walls.  Callers must not
+    change it.
+    """
+    global _successorTable
+    cached, table = _successorTable
+    if walls is not cached and walls != cached:
+        _successorTable = walls, cellSuccessorTable(walls)
+    return _successorTable[1]
+
 #####################################################
 # This portion is incomplete.  Time to write code!  #
 #####################################################
@@ -270,7 +421,9 @@ class CornersProblem(search.SearchProblem):
     """
     This search problem finds paths through all four corners of a layout.
 
-    You must select a suitable state space and successor function
+    A search state is a tuple ( cell, cornerMask ) where cell is the cell id
+    of Pacman's position (see cellSuccessorTable) and bit i of cornerMask is
+    set while self.corners[i] has not been visited yet.
     """
 
     def __init__(self, startingGameState):
@@ -288,7 +441,18 @@ class CornersProblem(search.SearchProblem):
         # Please add any code here which you would like to use
         # in initializing the problem
         "*** YOUR CODE HERE ***"
+        self.successorTable = layoutSuccessorTable(self.walls)
+        self.cornerBits = {}
+        for index, (x, y) in self.corners.items():
+            self.cornerBits[self.getCell((x, y))] = 1 << index
+
+    def getCell(self, position):
+        "Returns the cell id of an (x,y) position"
+        return position[0] * self.walls.height + position[1]
 
+    def getPosition(self, cell):
+        "Returns the (x,y) position of a cell id"
+        return cell // self.walls.height, cell % self.walls.height
 
     def getStartState(self):
         """
@@ -296,16 +460,15 @@ class CornersProblem(search.SearchProblem):
         space)
         """
         "*** YOUR CODE HERE ***"
-        return (self.startingPosition, self.corners)
-        util.raiseNotDefined()
+        cell = self.getCell(self.startingPosition)
+        return (cell, ((1 << len(self.corners)) - 1) & ~self.cornerBits.get(cell, 0))
 
     def isGoalState(self, state):
         """
         Returns whether this search state is a goal state of the problem.
         """
         "*** YOUR CODE HERE ***"
-        return (len(state[1]) == 0)
-        util.raiseNotDefined()
+        return state[1] == 0
 
     def getSuccessors(self, state):
         """
@@ -319,29 +482,11 @@ class CornersProblem(search.SearchProblem):
          successor to the current state.
         """
 
+        "*** YOUR CODE HERE ***"
+        cell, mask = state
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            #   x,y = currentPosition
-            #   dx, dy = Actions.directionToVector(action)
-            #   nextx, nexty = int(x + dx), int(y + dy)
-            #   hitsWall = self.walls[nextx][nexty]
-
-            "*** YOUR CODE HERE ***"
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            temp = -1
-            if not self.walls[nextx][nexty]:
-                corners = state[1].copy()
-                for key, value in corners.items():
-                    if (nextx, nexty) == value:
-                        temp = key
-                        break
-                if temp != -1:
-                    corners.pop(temp)
-                successors.append((action, 1, ((nextx, nexty), corners)))
+        for action, nextCell in self.successorTable[cell]:
+            successors.append((action, 1, (nextCell, mask & ~self.cornerBits.get(nextCell, 0))))
 
         self._expanded += 1 # DO NOT CHANGE
         return successors
@@ -376,13 +521,11 @@ def cornersHeuristic(state, problem):
     corners = problem.corners # These are the corner coordinates
     walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
     "*** YOUR CODE HERE ***"
+    x, y = problem.getPosition(state[0])
     h = 0
-    pq = util.PriorityQueue()
-    for key, value in state[1].items():
-        distance = abs(value[0] - state[0][0]) + abs(value[1] - state[0][1])
-        pq.push(distance, distance)
-    while not pq.isEmpty():
-        h = pq.pop()
+    for index, corner in corners.items():
+        if state[1] & (1 << index):
+            h = max(h, abs(corner[0] - x) + abs(corner[1] - y))
     return h # Default to trivial solution
 
 class AStarCornersAgent(SearchAgent):
@@ -396,41 +539,66 @@ class FoodSearchProblem:
     A search problem associated with finding the a path that collects all of the
     food (dots) in a Pacman game.
 
-    A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
-      pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+    A search state in this problem is a tuple ( cell, foodMask ) where
+      cell:     the cell id of Pacman's position (see cellSuccessorTable)
+      foodMask: an int whose bit i is set while self.foodPositions[i] is uneaten
+
+    Use getPosition and getFoodGrid to turn a state back into a position and a
+    Grid (see game.py) of remaining food.
     """
     def __init__(self, startingGameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
+        self.startingPosition = startingGameState.getPacmanPosition()
+        self.foodPositions = startingGameState.getFood().asList()
+        self.foodBits = {}
+        for index, position in enumerate(self.foodPositions):
+            self.foodBits[self.getCell(position)] = 1 << index
+        self.successorTable = layoutSuccessorTable(self.walls)
+        cell = self.getCell(self.startingPosition)
+        self.start = (cell, ((1 << len(self.foodPositions)) - 1) & ~self.foodBits.get(cell, 0))
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
 
+    def getCell(self, position):
+        "Returns the cell id of an (x,y) position"
+        return position[0] * self.walls.height + position[1]
+
+    def getPosition(self, cell):
+        "Returns the (x,y) position of a cell id"
+        return cell // self.walls.height, cell % self.walls.height
+
+    def getFoodList(self, state):
+        "Returns the positions of the food remaining in state"
+        mask = state[1]
+        return [self.foodPositions[i] for i in range(len(self.foodPositions)) if mask >> i & 1]
+
+    def getFoodGrid(self, state):
+        "Returns a Grid of the food remaining in state"
+        grid = Grid(self.walls.width, self.walls.height)
+        for x, y in self.getFoodList(state):
+            grid[x][y] = True
+        return grid
+
     def getStartState(self):
         return self.start
 
     def isGoalState(self, state):
-        return state[1].count() == 0
+        return state[1] == 0
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
+        cell, mask = state
         successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( direction, 1,((nextx, nexty), nextFood)) )
+        for direction, nextCell in self.successorTable[cell]:
+            successors.append( ( direction, 1, (nextCell, mask & ~self.foodBits.get(nextCell, 0))) )
         return successors
 
     def getCostOfActions(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
         include an illegal move, return 999999"""
-        x,y= self.getStartState()[0]
+        x,y= self.startingPosition
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -447,6 +615,24 @@ class AStarFoodSearchAgent(SearchAgent):
         self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
         self.searchType = FoodSearchProblem
 
+class IDAStarFoodSearchAgent(SearchAgent):
+    "A SearchAgent for FoodSearchProblem using IDA* and your foodHeuristic"
+    def __init__(self):
+        self.searchFunction = lambda prob: search.iterativeDeepeningAStarSearch(prob, foodHeuristic)
+        self.searchType = FoodSearchProblem
+
+class SMAStarFoodSearchAgent(SearchAgent):
+    """
+    A SearchAgent for FoodSearchProblem using SMA* and your foodHeuristic.
+    The number of search nodes kept in memory is bounded by maxNodes:
+
+    > python pacman.py -l trickySearch -p SMAStarFoodSearchAgent -a maxNodes=2000
+    """
+    def __init__(self, maxNodes=search.SMA_MAX_NODES):
+        maxNodes = int(maxNodes)
+        self.searchFunction = lambda prob: search.smaStarSearch(prob, foodHeuristic, maxNodes)
+        self.searchType = FoodSearchProblem
+
 def foodHeuristic(state, problem):
     """
     Your heuristic for the FoodSearchProblem goes here.
@@ -460,9 +646,10 @@ def foodHeuristic(state, problem):
     other hand, inadmissible or inconsistent heuristics may find optimal
     solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
-    (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    The state is a tuple ( cell, foodMask ) (see FoodSearchProblem).  You can
+    call problem.getPosition(cell) to get Pacman's (x,y) position, and
+    problem.getFoodList(state) or problem.getFoodGrid(state) to get the
+    remaining food.
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -475,37 +662,84 @@ def foodHeuristic(state, problem):
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
     """
-    position, foodGrid = state
+    cell, foodMask = state
     "*** YOUR CODE HERE ***"
-    food_list = foodGrid.asList()
-    if len(food_list) == 0:
+    if foodMask == 0:
         return 0
 
-    h = 0
-    for food in food_list:
-        if (position, food) in problem.heuristicInfo:
-            temp = problem.heuristicInfo[(position, food)]
-        else:
-            temp = mazeDistance(position, food, problem.startingGameState)
-            problem.heuristicInfo[(position, food)] = temp
-        if h < temp:
-            h = temp
-    return h
+    info = problem.heuristicInfo
+    if 'foodDistances' not in info:
+        # Precompute the maze distance from each dot to every reachable cell.
+        info['foodDistances'] = [mazeDistancesFrom(food, problem.walls) for food in problem.foodPositions]
+        info['mst'] = {}
+
+    foods, distances = problem.foodPositions, info['foodDistances']
+    remaining = [i for i in range(len(foods)) if foodMask >> i & 1]
+    if foodMask not in info['mst']:
+        info['mst'][foodMask] = foodSpanningTreeCost(remaining, foods, distances)
+    # Food that cannot be reached makes the state a dead end, with infinite cost.
+    position = problem.getPosition(cell)
+    return min([distances[i].get(position, float('inf')) for i in remaining]) + info['mst'][foodMask]
+
+def foodSpanningTreeCost(remaining, foods, distances):
+    """
+    Returns the weight of the minimum spanning tree over the food indices in
+    remaining, where edges are weighted by maze distance (Prim's algorithm).
+    The weight is infinite if some of the food cannot reach the rest.
+    """
+    infinity = float('inf')
+    first, rest = remaining[0], remaining[1:]
+    closest = dict((j, distances[first].get(foods[j], infinity)) for j in rest)
+    total = 0
+    while closest:
+        i = min(closest, key=closest.get)
+        total += closest.pop(i)
+        for j in closest:
+            d = distances[i].get(foods[j], infinity)
+            if d < closest[j]:
+                closest[j] = d
+    return total
+
+def mazeDistancesFrom(source, walls):
+    """
+    Returns a dictionary mapping every position reachable from source to its
+    maze distance from source, computed by breadth first search over walls.
+    """
+    distances = {source: 0}
+    frontier = [source]
+    while frontier:
+        nextFrontier = []
+        for x, y in frontier:
+            d = distances[(x, y)] + 1
+            for nextPos in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]:
+                if nextPos not in distances and not walls[nextPos[0]][nextPos[1]]:
+                    distances[nextPos] = d
+                    nextFrontier.append(nextPos)
+        frontier = nextFrontier
+    return distances
 
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
     def registerInitialState(self, state):
+        """
+        Plans the greedy closest-dot tour directly on the walls and the food
+        rather than simulating the game state.  A ClosestFoodField keeps the
+        distance from every cell to the nearest dot as dots are eaten, so
+        each leg is a walk down that field instead of a new search.  The
+        tour is the same one a sequence of findPathToClosestDot calls would
+        produce.
+        """
         self.actions = []
-        currentState = state
-        while(currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
+        walls = state.getWalls()
+        field = ClosestFoodField(state.getFood(), layoutSuccessorTable(walls))
+        x, y = state.getPacmanPosition()
+        cell = x * walls.height + y
+        for i in range(state.getNumFood()):
+            nextPathSegment, cell = field.pathFrom(cell)
+            if nextPathSegment is None:
+                raise Exception('No reachable food left from %s' % str(state.getPacmanPosition()))
             self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception('findPathToClosestDot returned an illegal move: %s!\n%s' % t)
-                currentState = currentState.generateSuccessor(0, action)
+            field.remove(cell)
         self.actionIndex = 0
         print('Path found with cost %d.' % len(self.actions))
 
@@ -518,11 +752,118 @@ class ClosestDotSearchAgent(SearchAgent):
         startPosition = gameState.getPacmanPosition()
         food = gameState.getFood()
         walls = gameState.getWalls()
-        problem = AnyFoodSearchProblem(gameState)
 
         "*** YOUR CODE HERE ***"
-        return search.ucs(problem)
-        util.raiseNotDefined()
+        cell = startPosition[0] * walls.height + startPosition[1]
+        return pathToClosestDot(cell, food, layoutSuccessorTable(walls))[0]
+
+def pathToClosestDot(cell, food, successorTable):
+    """
+    Breadth first search from cell that stops at the first cell containing
+    food.  Returns (actions, foodCell), or (None, None) if no food is
+    reachable.  Ties are broken in the same order as a uniform cost search on
+    an AnyFoodSearchProblem.
+    """
+    height = food.height
+    if food[cell // height][cell % height]:
+        return [], cell
+    parents = {cell: None}
+    frontier = [cell]
+    while frontier:
+        nextFrontier = []
+        for current in frontier:
+            for action, nextCell in successorTable[current]:
+                if nextCell in parents:
+                    continue
+                parents[nextCell] = (current, action)
+                if food[nextCell // height][nextCell % height]:
+                    actions, goal = [], nextCell
+                    while parents[nextCell] is not None:
+                        nextCell, action = parents[nextCell]
+                        actions.append(action)
+                    actions.reverse()
+                    return actions, goal
+                nextFrontier.append(nextCell)
+        frontier = nextFrontier
+    return None, None
+
+class ClosestFoodField:
+    """
+    The maze distance from every cell to the nearest food, and which food
+    that is, kept up to date as food is removed.  It is built with one
+    breadth first search from all the food at once; removing a dot only
+    searches again over the cells that dot was nearest to.
+    """
+    def __init__(self, food, successorTable):
+        self.successorTable = successorTable
+        self.neighbors = [[nextCell for action, nextCell in moves] for moves in successorTable]
+        self.distance = [float('inf')] * len(successorTable)
+        self.owner = [None] * len(successorTable)
+        frontier = [x * food.height + y for x, y in food.asList()]
+        for cell in frontier:
+            self.distance[cell], self.owner[cell] = 0, cell
+        d = 0
+        while frontier:
+            d, nextFrontier = d + 1, []
+            for cell in frontier:
+                for nextCell in self.neighbors[cell]:
+                    if self.owner[nextCell] is None:
+                        self.distance[nextCell], self.owner[nextCell] = d, self.owner[cell]
+                        nextFrontier.append(nextCell)
+            frontier = nextFrontier
+
+    def pathFrom(self, cell):
+        """
+        Returns (actions, foodCell) for a shortest path from cell to the
+        nearest food, or (None, None) if no food is reachable.  Of several
+        such paths, the one pathToClosestDot finds is returned: each step
+        takes the first move, in successor table order, that gets closer.
+        """
+        distance = self.distance
+        if distance[cell] == float('inf'):
+            return None, None
+        actions = []
+        while distance[cell] > 0:
+            for action, nextCell in self.successorTable[cell]:
+                if distance[nextCell] == distance[cell] - 1:
+                    actions.append(action)
+                    cell = nextCell
+                    break
+        return actions, cell
+
+    def remove(self, foodCell):
+        "Removes the food at foodCell, updating the cells it was nearest to."
+        distance, owner, neighbors = self.distance, self.owner, self.neighbors
+        infinity = float('inf')
+
+        # Find the cells foodCell was nearest to, and for each the nearest
+        # food through a neighbor outside them.
+        region, buckets = [foodCell], {}
+        owner[foodCell], distance[foodCell] = None, infinity
+        for cell in region:
+            best, bestOwner = infinity, None
+            for nextCell in neighbors[cell]:
+                other = owner[nextCell]
+                if other == foodCell:
+                    owner[nextCell], distance[nextCell] = None, infinity
+                    region.append(nextCell)
+                elif other is not None and distance[nextCell] < best:
+                    best, bestOwner = distance[nextCell], other
+            if bestOwner is not None:
+                distance[cell], owner[cell] = best + 1, bestOwner
+                buckets.setdefault(best + 1, []).append(cell)
+
+        # Search the region again from there, closest first.
+        d = min(buckets) if buckets else 0
+        while buckets:
+            for cell in buckets.pop(d, []):
+                if distance[cell] != d:
+                    continue
+                for nextCell in neighbors[cell]:
+                    if d + 1 < distance[nextCell]:
+                        distance[nextCell], owner[nextCell] = d + 1, owner[cell]
+                        buckets.setdefault(d + 1, []).append(nextCell)
+            d += 1
 
 class AnyFoodSearchProblem(PositionSearchProblem):
     """
@@ -561,6 +902,60 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         return self.food[x][y]
         util.raiseNotDefined()
 
+class DStarLiteFoodAgent(SearchAgent):
+    """
+    Eats all the food while steering clear of ghosts, replanning every turn
+    with an incremental D* Lite planner (search.DStarLite) instead of a fresh
+    A* search.  Cells next to a non-scared ghost cost ghostPenalty to enter;
+    eaten food stops being a goal.  Only the part of the search tree that
+    these changes touch is repaired.
+
+    > python pacman.py -l mediumClassic -p DStarLiteFoodAgent -a ghostPenalty=50
+    """
+    def __init__(self, ghostPenalty=100):
+        self.ghostPenalty = float(ghostPenalty)
+
+    def registerInitialState(self, state):
+        starttime = time.time()
+        self.danger = set()
+        costFn = lambda pos: self.ghostPenalty if pos in self.danger else 1
+        self.problem = PositionSearchProblem(state, costFn, warn=False, visualize=False)
+        self.planner = search.DStarLite(self.problem, state.getFood().asList(), util.manhattanDistance)
+        self.updateDanger(state)
+        plan = self.planner.getPlan()
+        if plan is None:
+            print('No path found in %.1f seconds' % (time.time() - starttime))
+        else:
+            # The planner minimizes step costs with ghost penalties, not steps.
+            cost = 0 if self.planner.start in self.planner.goals else self.planner.getG(self.planner.start)
+            print('Path found with total cost of %g (%d steps) in %.1f seconds' %
+                  (cost, len(plan), time.time() - starttime))
+        print('Search nodes expanded: %d' % self.problem._expanded)
+
+    def updateDanger(self, state):
+        "Recomputes the cells near ghosts and tells the planner which changed."
+        danger = set()
+        for ghostState in state.getGhostStates():
+            if ghostState.scaredTimer > 0: continue
+            x, y = util.nearestPoint(ghostState.getPosition())
+            for cell in [(x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+                if not self.problem.walls[cell[0]][cell[1]]:
+                    danger.add(cell)
+        changed = danger ^ self.danger
+        self.danger = danger
+        self.planner.updateStates(changed)
+
+    def getAction(self, state):
+        self.planner.moveTo(state.getPacmanPosition())
+        for food in list(self.planner.goals):
+            if not state.hasFood(*food):
+                self.planner.removeGoal(food)
+        self.updateDanger(state)
+        plan = self.planner.getPlan()
+        if not plan or plan[0] not in state.getLegalPacmanActions():
+            return Directions.STOP
+        return plan[0]
+
 def mazeDistance(point1, point2, gameState):
     """
     Returns the maze distance between any two points, using the search functions
@@ -0,0 +1,262 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Benchmarks the search functions in search.py on the search problems in
+searchAgents.py, over the P1 layouts and randomly generated mazes.
+
+Every (problem, layout, search function) combination is run once under
+instrumentation (searchStats.py) for solution cost, expansions, frontier and
+peak memory, then REPEATS more times for wall time.  Runs are seeded, so
+expansions and costs are reproducible.  Combinations that exceed the time
+limit are reported as timeouts.
+
+> python searchBenchmark.py                          # the whole suite
+> python searchBenchmark.py -f astar,idastar -p FoodSearchProblem
+> python searchBenchmark.py --save benchmarkBaseline.json
+> python searchBenchmark.py --baseline benchmarkBaseline.json
+
+With --baseline, a combination is flagged as a regression if it now times
+out, finds a costlier solution, or needs more expansions, peak memory or
+wall time than the baseline by more than the tolerance.  The exit status
+is 1 when anything regressed.  Wall times depend on the machine, so save a
+baseline on the machine you compare on.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+import layout
+import pacman
+import search
+import searchAgents
+import searchStats
+import util
+
+SEARCH_FUNCTIONS = ['depthFirstSearch', 'breadthFirstSearch', 'uniformCostSearch', 'aStarSearch',
+                    'iterativeDeepeningAStarSearch', 'smaStarSearch', 'anytimeAStarSearch']
+
+# Problem type -> (layouts, heuristic for the informed searches).  Layouts
+# named maze<N> are N x N mazes generated from the seed.
+BENCHMARK_SUITE = {
+    'PositionSearchProblem': (['tinyMaze', 'mediumMaze', 'bigMaze', 'maze41', 'maze101'], 'manhattanHeuristic'),
+    'CornersProblem': (['tinyCorners', 'mediumCorners', 'bigCorners', 'maze41'], 'cornersHeuristic'),
+    'FoodSearchProblem': (['testSearch', 'tinySearch', 'trickySearch'], 'foodHeuristic'),
+    'AnyFoodSearchProblem': (['mediumMaze', 'bigMaze', 'maze101'], 'nullHeuristic'),
+}
+
+def generateMaze(size, seed, corners=False):
+    """
+    Returns the text of a size x size maze (size is rounded up to odd): a
+    random spanning tree of the cells, carved by depth first search, with a
+    few extra walls knocked out so there is more than one route.  Pacman
+    starts in the top right and there is food in the bottom left or, if
+    corners is set, Pacman starts in the middle and there is food in all
+    four corners.
+    """
+    size = size | 1
+    rand = random.Random(seed)
+    grid = [['%'] * size for row in range(size)]
+    stack = [(1, 1)]
+    grid[1][1] = ' '
+    while stack:
+        row, col = stack[-1]
+        options = [(row + dr, col + dc, dr, dc) for dr, dc in [(2, 0), (-2, 0), (0, 2), (0, -2)]
+                   if 0 < row + dr < size - 1 and 0 < col + dc < size - 1 and grid[row + dr][col + dc] == '%']
+        if not options:
+            stack.pop()
+            continue
+        nextRow, nextCol, dr, dc = rand.choice(options)
+        grid[row + dr // 2][col + dc // 2] = ' '
+        grid[nextRow][nextCol] = ' '
+        stack.append((nextRow, nextCol))
+    for i in range(size * size // 50):
+        row, col = rand.randrange(1, size - 1), rand.randrange(1, size - 1)
+        if (row + col) % 2 == 1:
+            grid[row][col] = ' '
+
+    grid[size - 2][1] = '.'
+    if corners:
+        grid[1][1] = grid[1][size - 2] = grid[size - 2][size - 2] = '.'
+        grid[size // 2 | 1][size // 2 | 1] = 'P'
+    else:
+        grid[1][size - 2] = 'P'
+    return [''.join(row) for row in grid]
+
+def loadLayout(name, problemType, seed):
+    if name.startswith('maze'):
+        return layout.Layout(generateMaze(int(name[4:]), seed, problemType == 'CornersProblem'))
+    result = layout.getLayout(name)
+    if result is None:
+        raise Exception('The layout ' + name + ' cannot be found')
+    return result
+
+def makeProblem(problemClass, gameState, seed):
+    util.mutePrint()
+    try:
+        random.seed(seed)
+        return problemClass(gameState)
+    finally:
+        util.unmutePrint()
+
+def runSearch(function, problem, heuristic, timeout, instrumented=False):
+    "Runs one search, returning (actions, stats) or None on a timeout."
+    def run():
+        if instrumented:
+            return searchStats.runInstrumented(function, problem, heuristic, traceMemory=True)
+        starttime = time.perf_counter()
+        if heuristic is None:
+            actions = function(problem)
+        else:
+            actions = function(problem, heuristic=heuristic)
+        return actions, {'wallSeconds': time.perf_counter() - starttime}
+    util.mutePrint()
+    try:
+        return util.TimeoutFunction(run, timeout)()
+    except util.TimeoutFunctionException:
+        return None
+    finally:
+        util.unmutePrint()
+
+def benchmark(functions, problemTypes, layouts=None, repeats=3, seed=0, timeout=30):
+    """
+    Runs the benchmark and returns a dictionary from 'problem/layout/function'
+    to the measurements of that combination.
+    """
+    results = {}
+    for problemType in problemTypes:
+        suiteLayouts, heuristicName = BENCHMARK_SUITE[problemType]
+        problemClass = searchAgents.lookupProblem(problemType)
+        for layoutName in layouts or suiteLayouts:
+            gameState = pacman.GameState()
+            gameState.initialize(loadLayout(layoutName, problemType, seed), 0)
+            for fn in functions:
+                function = getattr(search, fn)
+                heuristic = None
+                if 'heuristic' in function.__code__.co_varnames:
+                    heuristic = searchAgents.lookupHeuristic(heuristicName)
+                key = '%s/%s/%s' % (problemType, layoutName, function.__name__)
+
+                problem = makeProblem(problemClass, gameState, seed)
+                outcome = runSearch(function, problem, heuristic, timeout, instrumented=True)
+                if outcome is None:
+                    results[key] = {'status': 'timeout'}
+                    print('%-60s timeout after %ds' % (key, timeout))
+                    continue
+                actions, stats = outcome
+
+                times = []
+                for i in range(repeats):
+                    problem = makeProblem(problemClass, gameState, seed)
+                    outcome = runSearch(function, problem, heuristic, timeout)
+                    if outcome is not None:
+                        times.append(outcome[1]['wallSeconds'])
+                times.sort()
+                result = {'status': 'ok',
+                          'cost': stats['solutionCost'],
+                          'expanded': stats['expanded'],
+                          'generated': stats['generated'],
+                          'peakFrontier': stats['peakFrontier'],
+                          'peakMemoryBytes': stats['peakMemoryBytes'],
+                          'wallSeconds': times[len(times) // 2] if times else None,
+                          'minWallSeconds': times[0] if times else None,
+                          'repeats': len(times)}
+                results[key] = result
+                print('%-60s cost %6s  expanded %8d  memory %8.1fkB  time %s' %
+                      (key, str(result['cost']), result['expanded'], result['peakMemoryBytes'] / 1024.0,
+                       '%.3fs' % result['wallSeconds'] if times else 'timeout'))
+    return results
+
+def findRegressions(results, baseline, tolerance=0.1, timeTolerance=0.5, minSeconds=0.01):
+    "Returns a list of messages describing results that are worse than baseline."
+    regressions = []
+    for key in sorted(results):
+        if key not in baseline:
+            continue
+        now, before = results[key], baseline[key]
+        if before['status'] != 'ok':
+            continue
+        if now['status'] != 'ok':
+            regressions.append('%s: now times out' % key)
+            continue
+        if now['cost'] is not None and before['cost'] is not None and now['cost'] > before['cost']:
+            regressions.append('%s: solution cost %s -> %s' % (key, before['cost'], now['cost']))
+        for field in ['expanded', 'peakMemoryBytes']:
+            if before[field] and now[field] > before[field] * (1 + tolerance):
+                regressions.append('%s: %s %d -> %d' % (key, field, before[field], now[field]))
+        if before['wallSeconds'] is not None and now['wallSeconds'] is not None and \
+           now['wallSeconds'] > max(before['wallSeconds'] * (1 + timeTolerance), before['wallSeconds'] + minSeconds):
+            regressions.append('%s: wall time %.3fs -> %.3fs' % (key, before['wallSeconds'], now['wallSeconds']))
+    return regressions
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python searchBenchmark.py <options>')
+    parser.add_option('-f', '--functions', dest='functions', default=','.join(SEARCH_FUNCTIONS),
+                      help='comma separated search functions (or abbreviations) from search.py')
+    parser.add_option('-p', '--problems', dest='problems', default=','.join(sorted(BENCHMARK_SUITE)),
+                      help='comma separated problem types from searchAgents.py')
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='comma separated layouts, instead of each problem\'s own')
+    parser.add_option('-r', '--repeats', dest='repeats', type='int', default=3,
+                      help='number of timed runs per combination')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0,
+                      help='random seed for runs and generated mazes')
+    parser.add_option('-t', '--timeout', dest='timeout', type='int', default=30,
+                      help='seconds allowed per search')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='write all results to this JSON file')
+    parser.add_option('--save', dest='save', default=None,
+                      help='write the results as a new baseline file')
+    parser.add_option('--baseline', dest='baseline', default=None,
+                      help='compare against this baseline file and flag regressions')
+    parser.add_option('--tolerance', dest='tolerance', type='float', default=0.1,
+                      help='allowed relative growth of expansions and memory')
+    parser.add_option('--timeTolerance', dest='timeTolerance', type='float', default=0.5,
+                      help='allowed relative growth of wall time')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    functions = options.functions.split(',')
+    for fn in functions:
+        if fn not in dir(search):
+            raise AttributeError(fn + ' is not a search function in search.py.')
+    layouts = options.layouts.split(',') if options.layouts else None
+    if options.baseline:
+        # Load the baseline before spending minutes on the suite.
+        if not os.path.isfile(options.baseline):
+            raise Exception('Baseline file %s not found; make one with --save %s first.'
+                            % (options.baseline, options.baseline))
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+    results = benchmark(functions, options.problems.split(','), layouts,
+                        options.repeats, options.seed, options.timeout)
+
+    for path in [options.output, options.save]:
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+    if options.baseline:
+        regressions = findRegressions(results, baseline, options.tolerance, options.timeTolerance)
+        for message in regressions:
+            print('REGRESSION ' + message)
+        print('%d regression(s) against %s' % (len(regressions), options.baseline))
+        sys.exit(1 if regressions else 0)
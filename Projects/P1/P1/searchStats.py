@@ -0,0 +1,156 @@
+# searchStats.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Instrumentation for the search functions in search.py.
+
+The search functions themselves are left untouched: the problem and the
+heuristic are wrapped so that every call the search makes goes through a
+counter and a timer.  For example:
+
+  actions, stats = searchStats.runInstrumented(search.aStarSearch, problem,
+                                               searchAgents.foodHeuristic)
+  searchStats.writeStats(stats, 'astar-trickySearch.json')
+
+The recorded statistics are
+
+  expanded          calls to getSuccessors
+  generated         successors returned by those calls
+  duplicates        generated states that had been generated before
+  goalTests         calls to isGoalState
+  peakFrontier      largest number of generated but unexpanded nodes
+                    (the start counts as generated); for searches that
+                    push every successor this is the peak fringe size
+  peakMemoryBytes   peak Python heap growth during the search (only with
+                    traceMemory, which slows the search down)
+  heuristicCalls, heuristicSeconds, successorSeconds, wallSeconds
+  maxHeuristicSeconds, maxSuccessorSeconds  slowest single call
+  expansionTrace    the expanded states in order (only with trace)
+"""
+
+import json
+import time
+import tracemalloc
+
+class InstrumentedProblem:
+    """
+    Wraps a SearchProblem and records how a search uses it.  Any other
+    attribute is read from the wrapped problem, so heuristics that look at
+    problem.walls or problem.heuristicInfo keep working.
+    """
+    def __init__(self, problem, trace=False):
+        self.problem = problem
+        self.stats = {'expanded': 0, 'generated': 0, 'duplicates': 0, 'goalTests': 0,
+                      'peakFrontier': 1, 'successorSeconds': 0.0, 'maxSuccessorSeconds': 0.0,
+                      'heuristicCalls': 0, 'heuristicSeconds': 0.0, 'maxHeuristicSeconds': 0.0}
+        self.trace = [] if trace else None
+        try:
+            self.seen = set([problem.getStartState()])
+        except TypeError:
+            self.seen = None  # Unhashable states: duplicates are not counted
+
+    def __getattr__(self, name):
+        if name == 'problem':
+            raise AttributeError(name)
+        return getattr(self.problem, name)
+
+    def getStartState(self):
+        return self.problem.getStartState()
+
+    def isGoalState(self, state):
+        self.stats['goalTests'] += 1
+        return self.problem.isGoalState(state)
+
+    def getSuccessors(self, state):
+        stats = self.stats
+        starttime = time.perf_counter()
+        successors = self.problem.getSuccessors(state)
+        elapsed = time.perf_counter() - starttime
+        stats['successorSeconds'] += elapsed
+        stats['maxSuccessorSeconds'] = max(stats['maxSuccessorSeconds'], elapsed)
+
+        stats['expanded'] += 1
+        stats['generated'] += len(successors)
+        if self.seen is not None:
+            for successor in successors:
+                if successor[2] in self.seen:
+                    stats['duplicates'] += 1
+                else:
+                    self.seen.add(successor[2])
+        frontier = stats['generated'] + 1 - stats['expanded']
+        if frontier > stats['peakFrontier']:
+            stats['peakFrontier'] = frontier
+        if self.trace is not None:
+            self.trace.append(state)
+        return successors
+
+    def getCostOfActions(self, actions):
+        return self.problem.getCostOfActions(actions)
+
+def instrumentHeuristic(heuristic, instrumented):
+    "Returns heuristic wrapped to record its calls in instrumented.stats."
+    def timedHeuristic(state, problem=None):
+        stats = instrumented.stats
+        starttime = time.perf_counter()
+        h = heuristic(state, problem)
+        elapsed = time.perf_counter() - starttime
+        stats['heuristicCalls'] += 1
+        stats['heuristicSeconds'] += elapsed
+        stats['maxHeuristicSeconds'] = max(stats['maxHeuristicSeconds'], elapsed)
+        return h
+    return timedHeuristic
+
+def runInstrumented(searchFunction, problem, heuristic=None, traceMemory=False, trace=False, **kwargs):
+    """
+    Runs searchFunction on problem (with heuristic, if given) and returns
+    (actions, stats), where stats is a dictionary ready for writeStats.
+    """
+    instrumented = InstrumentedProblem(problem, trace)
+    if heuristic is not None:
+        kwargs['heuristic'] = instrumentHeuristic(heuristic, instrumented)
+
+    if traceMemory:
+        tracemalloc.start()
+    starttime = time.perf_counter()
+    try:
+        actions = searchFunction(instrumented, **kwargs)
+    finally:
+        wallSeconds = time.perf_counter() - starttime
+        if traceMemory:
+            peakMemory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    stats = dict(instrumented.stats)
+    stats['algorithm'] = getattr(searchFunction, '__name__', str(searchFunction))
+    stats['heuristic'] = getattr(heuristic, '__name__', None)
+    stats['problem'] = type(problem).__name__
+    stats['wallSeconds'] = wallSeconds
+    stats['solutionLength'] = len(actions) if actions is not None else None
+    stats['solutionCost'] = problem.getCostOfActions(actions) if actions is not None else None
+    stats['peakMemoryBytes'] = peakMemory if traceMemory else None
+    if trace:
+        stats['expansionTrace'] = [_jsonState(state) for state in instrumented.trace]
+    return actions, stats
+
+def _jsonState(state):
+    if isinstance(state, (int, float, str)) or state is None:
+        return state
+    if isinstance(state, tuple):
+        return [_jsonState(item) for item in state]
+    return str(state)
+
+def writeStats(stats, path):
+    "Writes one run's statistics to path as JSON."
+    with open(path, 'w') as f:
+        json.dump(stats, f, indent=2, sort_keys=True)
@@ -0,0 +1,85 @@
+# searchTests.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Regression tests for the searches in search.py:
+
+> python -m unittest searchTests
+"""
+
+import unittest
+
+import layout
+import pacman
+import search
+import searchAgents
+
+# 4 dots, collected in 8 moves at best
+SMALL_MAZE = ["%%%%%%%%",
+              "%      %",
+              "%    P %",
+              "% .   .%",
+              "% . .  %",
+              "%%%%%%%%"]
+
+class BoundedFoodSearchProblem(searchAgents.FoodSearchProblem):
+    "A FoodSearchProblem that fails once more than maxExpanded nodes are expanded."
+    def __init__(self, startingGameState, maxExpanded):
+        searchAgents.FoodSearchProblem.__init__(self, startingGameState)
+        self.maxExpanded = maxExpanded
+
+    def getSuccessors(self, state):
+        if self._expanded >= self.maxExpanded:
+            raise AssertionError('expanded more than %d nodes' % self.maxExpanded)
+        return searchAgents.FoodSearchProblem.getSuccessors(self, state)
+
+def foodProblem(lay, maxExpanded=100000):
+    state = pacman.GameState()
+    state.initialize(lay, 0)
+    return BoundedFoodSearchProblem(state, maxExpanded)
+
+class SMAStarTest(unittest.TestCase):
+
+    def assertCollectsFood(self, problem, actions, cost):
+        self.assertEqual(problem.getCostOfActions(actions), cost)
+        state = problem.getStartState()
+        for action in actions:
+            state = dict((a, s) for a, _, s in problem.getSuccessors(state))[action]
+        self.assertTrue(problem.isGoalState(state))
+
+    def testSmallBudgetsTerminate(self):
+        # Tight budgets with many ties in f used to thrash without end.
+        lay = layout.Layout(SMALL_MAZE)
+        for maxNodes in range(10, 21):
+            problem = foodProblem(lay)
+            actions = search.smaStarSearch(problem, search.nullHeuristic, maxNodes)
+            self.assertCollectsFood(problem, actions, 8)
+
+    def testBudgetOfSolutionDepth(self):
+        # The 8 moves take 9 nodes, counting the start.
+        lay = layout.Layout(SMALL_MAZE)
+        problem = foodProblem(lay)
+        actions = search.smaStarSearch(problem, search.nullHeuristic, 9)
+        self.assertCollectsFood(problem, actions, 8)
+        problem = foodProblem(lay)
+        self.assertEqual(search.smaStarSearch(problem, search.nullHeuristic, 8), [])
+
+    def testMatchesAStar(self):
+        lay = layout.getLayout('tinySearch')
+        problem = foodProblem(lay, 1000)
+        actions = search.smaStarSearch(problem, searchAgents.foodHeuristic, 50)
+        self.assertCollectsFood(problem, actions, 27)
+
+if __name__ == '__main__':
+    unittest.main()
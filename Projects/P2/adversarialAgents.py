@@ -0,0 +1,1001 @@
+# adversarialAgents.py
+# --------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Adversarial search agents that go beyond the fixed depth searches of
+multiAgents.py.  They are found by pacman.py like any other agent:
+
+> python pacman.py -p IterativeDeepeningAgent -l mediumClassic -a timeLimit=0.5
+
+Run this module to compare the alpha-beta nodes searched under each move
+ordering, on states sampled from a layout:
+
+> python adversarialAgents.py -l mediumClassic -d 5
+
+ParallelMinimaxAgent and ParallelExpectimaxAgent spread a search over
+worker processes (workers=0, the default, starts one per CPU):
+
+> python pacman.py -p ParallelExpectimaxAgent -l smallClassic -a depth=3,split=chance
+
+MCTSAgent plans by Monte Carlo tree search within a time budget, playing
+games out on a light copy of the state (Rollout):
+
+> python pacman.py -p MCTSAgent -l mediumClassic -a timeLimit=0.5,policy=greedy
+
+As in multiAgents.py, one unit of depth is a move by Pacman followed by a
+move by every ghost; a ply is a single agent's move.
+"""
+
+import copy
+import math
+import random
+import time
+
+from game import Actions, Agent, Directions
+from multiAgents import MultiAgentSearchAgent
+from pacman import COLLISION_TOLERANCE, SCARED_TIME, TIME_PENALTY
+
+def stateKey(gameState):
+    """
+    Returns a compact, hashable key for the parts of a game state that
+    matter to search: agent positions, directions (ghosts may not reverse)
+    and scared timers, the food, the capsules and the score.  Unlike the
+    GameState hash, it never maps two different states to the same key.
+    """
+    data = gameState.data
+    agents = tuple((agent.configuration.pos, agent.configuration.direction, agent.scaredTimer)
+                   for agent in data.agentStates)
+    return (agents, b''.join(map(bytes, data.food.data)), tuple(data.capsules), data.score)
+
+# Transposition table entry flags: the stored value is exact, a lower bound
+# (the search failed high) or an upper bound (it failed low).
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class SearchTimeout(Exception):
+    "Raised inside a search when the move's time budget has run out."
+    pass
+
+class MoveOrdering:
+    """
+    Decides the order in which alpha-beta tries the actions at a node; the
+    earlier a refuting action is tried, the more of the node is pruned.
+    Each source of ordering can be switched on separately:
+
+      table    the best action stored for the state in the transposition table
+      killers  actions that caused a cutoff at the same ply elsewhere in the
+               tree (the two most recent per ply and agent)
+      history  actions that have caused cutoffs anywhere, weighted by the
+               depth of the cut subtree, by agent, position and action
+      static   the evaluation of each successor: best for the mover first
+
+    With none of them, actions are tried in getLegalActions order.  A
+    different policy can be plugged into an agent by subclassing and
+    replacing its ordering attribute.
+    """
+
+    def __init__(self, table=True, killers=True, history=True, static=False, evaluationFunction=None):
+        self.table, self.killers, self.history, self.static = table, killers, history, static
+        self.evaluationFunction = evaluationFunction
+        self.killerMoves = {}
+        self.historyScores = {}
+
+    def newMove(self):
+        "Called before the search for each move: ages the history scores and forgets killers."
+        self.killerMoves = {}
+        self.historyScores = dict((key, score // 2) for key, score in self.historyScores.items() if score > 1)
+
+    def order(self, state, agent, ply, actions, tableAction):
+        """
+        Returns a list of (action, successor) pairs in search order, where
+        successor is the successor state if it was generated to order the
+        actions and None otherwise.
+        """
+        successors = dict((action, None) for action in actions)
+        if not (self.table or self.killers or self.history or self.static):
+            return [(action, None) for action in actions]
+
+        killers = self.killerMoves.get((ply, agent), []) if self.killers else []
+        if self.history:
+            position = state.data.agentStates[agent].configuration.pos
+        if self.static:
+            sign = 1 if agent == 0 else -1
+            for action in actions:
+                successors[action] = state.generateSuccessor(agent, action)
+
+        def rank(action):
+            return (self.table and action == tableAction,
+                    len(killers) - killers.index(action) if action in killers else 0,
+                    self.historyScores.get((agent, position, action), 0) if self.history else 0,
+                    sign * self.evaluationFunction(successors[action]) if self.static else 0)
+        # The sort is stable, so ties keep getLegalActions order
+        ordered = sorted(actions, key=rank, reverse=True)
+        return [(action, successors[action]) for action in ordered]
+
+    def cutoff(self, state, agent, ply, action, plies):
+        "Called when action caused a cutoff at a node with plies plies left."
+        if self.killers:
+            killers = self.killerMoves.setdefault((ply, agent), [])
+            if action not in killers:
+                killers.insert(0, action)
+                del killers[2:]
+        if self.history:
+            position = state.data.agentStates[agent].configuration.pos
+            key = (agent, position, action)
+            self.historyScores[key] = self.historyScores.get(key, 0) + plies * plies
+
+class IterativeDeepeningAgent(MultiAgentSearchAgent):
+    """
+    A minimax agent with alpha-beta pruning that searches depth 1, 2, 3, ...
+    until timeLimit seconds have passed (or depth is reached), and plays the
+    best move of the deepest search that finished.
+
+    Results are kept in a transposition table keyed by stateKey and the
+    agent to move, holding the searched plies, a value with its bound type
+    and the best action.  The best action of a state is searched first the
+    next time the state is seen, so each iteration starts along the
+    principal variation of the one before.  The table is kept from move to
+    move, up to maxEntries entries.
+
+    ordering lists the MoveOrdering sources to use, comma separated (or
+    none), for example -a ordering=table,killers,history,static.
+    """
+
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='100', timeLimit='0.5',
+                 maxEntries='200000', ordering='table,killers,history'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth)
+        self.timeLimit = float(timeLimit)
+        self.maxEntries = int(maxEntries)
+        self.table = {}
+        self.nodes = 0
+        sources = [source for source in ordering.split(',') if source and source != 'none']
+        for source in sources:
+            if source not in ['table', 'killers', 'history', 'static']:
+                raise Exception('Unknown move ordering: ' + source)
+        self.ordering = MoveOrdering('table' in sources, 'killers' in sources, 'history' in sources,
+                                     'static' in sources, self.evaluationFunction)
+
+    def getAction(self, gameState):
+        self.deadline = time.time() + self.timeLimit
+        if len(self.table) > self.maxEntries:
+            self.table = {}
+        self.numAgents = gameState.getNumAgents()
+        self.ordering.newMove()
+
+        actions = gameState.getLegalActions(0)
+        bestAction = actions[0] if actions else Directions.STOP
+        self.searchedDepth = 0
+        for depth in range(1, self.depth + 1):
+            try:
+                value, action = self.searchRoot(gameState, depth * self.numAgents)
+            except SearchTimeout:
+                break
+            if action is not None:
+                bestAction = action
+            self.searchedDepth = depth
+            if time.time() > self.deadline:
+                break
+        return bestAction
+
+    def searchRoot(self, gameState, plies):
+        "Returns (value, action) of a full search of plies plies from gameState."
+        self.rootPlies = plies
+        entry = self.table.get((stateKey(gameState), 0))
+        actions = self.ordering.order(gameState, 0, 0, gameState.getLegalActions(0), entry and entry[3])
+        alpha, beta = -float('inf'), float('inf')
+        bestValue, bestAction = -float('inf'), None
+        for action, successor in actions:
+            if successor is None:
+                successor = gameState.generateSuccessor(0, action)
+            value = self.alphaBeta(successor, 1 % self.numAgents, plies - 1, alpha, beta)
+            if value > bestValue:
+                bestValue, bestAction = value, action
+            alpha = max(alpha, value)
+        self.table[(stateKey(gameState), 0)] = (plies, bestValue, EXACT, bestAction)
+        return bestValue, bestAction
+
+    def alphaBeta(self, state, agent, plies, alpha, beta):
+        """
+        Returns the minimax value of state with agent to move, searching
+        plies plies.  Values at or below alpha are upper bounds and values at
+        or above beta lower bounds, as usual.
+        """
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.time() > self.deadline:
+            raise SearchTimeout()
+        if plies == 0 or state.isWin() or state.isLose():
+            return self.evaluationFunction(state)
+
+        key = (stateKey(state), agent)
+        entry = self.table.get(key)
+        tableAction = None
+        if entry is not None:
+            entryPlies, value, flag, tableAction = entry
+            if entryPlies >= plies:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        ply = self.rootPlies - plies
+        actions = self.ordering.order(state, agent, ply, state.getLegalActions(agent), tableAction)
+        nextAgent = (agent + 1) % self.numAgents
+        originalAlpha, originalBeta = alpha, beta
+        bestAction = None
+        if agent == 0:
+            bestValue = -float('inf')
+            for action, successor in actions:
+                if successor is None:
+                    successor = state.generateSuccessor(agent, action)
+                value = self.alphaBeta(successor, nextAgent, plies - 1, alpha, beta)
+                if value > bestValue:
+                    bestValue, bestAction = value, action
+                if bestValue >= beta:
+                    self.ordering.cutoff(state, agent, ply, action, plies)
+                    break
+                alpha = max(alpha, bestValue)
+        else:
+            bestValue = float('inf')
+            for action, successor in actions:
+                if successor is None:
+                    successor = state.generateSuccessor(agent, action)
+                value = self.alphaBeta(successor, nextAgent, plies - 1, alpha, beta)
+                if value < bestValue:
+                    bestValue, bestAction = value, action
+                if bestValue <= alpha:
+                    self.ordering.cutoff(state, agent, ply, action, plies)
+                    break
+                beta = min(beta, bestValue)
+
+        if bestValue <= originalAlpha:
+            flag = UPPER
+        elif bestValue >= originalBeta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (plies, bestValue, flag, bestAction)
+        return bestValue
+
+def adversarialValue(state, agent, plies, evaluationFunction, chance=False):
+    """
+    Returns the value of state with agent to move, searching plies plies:
+    Pacman maximizes, and ghosts minimize or, if chance is set, choose
+    uniformly at random (expectimax).
+    """
+    if plies == 0 or state.isWin() or state.isLose():
+        return evaluationFunction(state)
+    nextAgent = (agent + 1) % state.getNumAgents()
+    values = [adversarialValue(state.generateSuccessor(agent, action), nextAgent, plies - 1,
+                               evaluationFunction, chance)
+              for action in state.getLegalActions(agent)]
+    if agent == 0:
+        return max(values)
+    if chance:
+        return sum(values) / float(len(values))
+    return min(values)
+
+def packState(gameState):
+    """
+    Returns the parts of a game state that change during a game, as a
+    small tuple of ints, strings and bytes.  The walls and the agents' start
+    positions come from the layout, which unpackState gets separately.
+    """
+    data = gameState.data
+    agents = tuple((agent.configuration.pos, agent.configuration.direction, agent.scaredTimer)
+                   for agent in data.agentStates)
+    return (agents, b''.join(map(bytes, data.food.data)), tuple(data.capsules), data.score,
+            data._win, data._lose)
+
+def unpackState(packed, template):
+    "Returns the game state packed by packState, built on a fresh state of the same layout."
+    from game import Configuration, Grid
+    agents, food, capsules, score, win, lose = packed
+    state = template.deepCopy()
+    data = state.data
+    for agentState, (pos, direction, scaredTimer) in zip(data.agentStates, agents):
+        agentState.configuration = Configuration(pos, direction)
+        agentState.scaredTimer = scaredTimer
+    height = data.food.height
+    data.food = Grid(data.food.width, height)
+    data.food.data = [[bool(cell) for cell in food[x * height:(x + 1) * height]] for x in range(data.food.width)]
+    data.capsules = list(capsules)
+    data.score, data._win, data._lose = score, win, lose
+    return state
+
+# The layout, evaluation function and kind of search of a worker process
+_workerContext = None
+
+def _initWorker(layout, numAgents, evaluationFunction, chance):
+    global _workerContext
+    import pacman
+    template = pacman.GameState()
+    template.initialize(layout, numAgents - 1)
+    _workerContext = (template, evaluationFunction, chance)
+
+def _workerValue(task):
+    packed, agent, plies = task
+    template, evaluationFunction, chance = _workerContext
+    return adversarialValue(unpackState(packed, template), agent, plies, evaluationFunction, chance)
+
+class ParallelSearchAgent(MultiAgentSearchAgent):
+    """
+    A minimax (or, with chance set, expectimax) agent that searches the
+    subtrees of the root actions on a pool of worker processes.  With
+    split=chance it also splits each subtree at the first ghost's moves,
+    for more and smaller tasks.  States are sent to the workers packed by
+    packState; the layout is sent once, when the pool starts.
+
+    Values are combined in getLegalActions order, exactly as a serial search
+    would, and ties go to the first action, so the chosen action is the one
+    the serial search (workers=1) chooses at the same depth.
+    """
+
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='2', workers='0', split='root', chance=False):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth)
+        self.workers = int(workers) or None
+        if split not in ['root', 'chance']:
+            raise Exception('split must be root or chance, not ' + split)
+        self.split = split
+        self.chance = chance not in [False, 'False', '0']
+        self.pool = None
+
+    def startPool(self, gameState):
+        import multiprocessing
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing.get_context()
+        self.pool = context.Pool(self.workers, _initWorker,
+                                 (gameState.data.layout, gameState.getNumAgents(), self.evaluationFunction, self.chance))
+
+    def getAction(self, gameState):
+        plies = self.depth * gameState.getNumAgents()
+        numAgents = gameState.getNumAgents()
+        actions = gameState.getLegalActions(0)
+        if not actions:
+            return Directions.STOP
+
+        # Tasks are (state, agent to move, plies left); groups holds, for each
+        # root action, the number of ghost actions whose values it combines
+        # (or None if its subtree is a single task)
+        tasks, groups = [], []
+        for action in actions:
+            successor = gameState.generateSuccessor(0, action)
+            if self.split == 'chance' and plies > 1 and numAgents > 1 and \
+               not (successor.isWin() or successor.isLose()):
+                ghostActions = successor.getLegalActions(1)
+                groups.append(len(ghostActions))
+                for ghostAction in ghostActions:
+                    tasks.append((successor.generateSuccessor(1, ghostAction), 2 % numAgents, plies - 2))
+            else:
+                groups.append(None)
+                tasks.append((successor, 1 % numAgents, plies - 1))
+
+        if self.workers == 1:
+            results = [adversarialValue(state, agent, taskPlies, self.evaluationFunction, self.chance)
+                       for state, agent, taskPlies in tasks]
+        else:
+            if self.pool is None:
+                self.startPool(gameState)
+            results = self.pool.map(_workerValue, [(packState(state), agent, taskPlies)
+                                                   for state, agent, taskPlies in tasks])
+
+        values, i = [], 0
+        for group in groups:
+            if group is None:
+                values.append(results[i])
+                i += 1
+            else:
+                ghostValues = results[i:i + group]
+                i += group
+                if self.chance:
+                    values.append(sum(ghostValues) / float(len(ghostValues)))
+                else:
+                    values.append(min(ghostValues))
+        return actions[values.index(max(values))]
+
+    def final(self, state):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+class ParallelMinimaxAgent(ParallelSearchAgent):
+    "Minimax over a process pool; see ParallelSearchAgent."
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='2', workers='0', split='root'):
+        ParallelSearchAgent.__init__(self, evalFn, depth, workers, split, False)
+
+class ParallelExpectimaxAgent(ParallelSearchAgent):
+    "Expectimax over a process pool; see ParallelSearchAgent."
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='2', workers='0', split='root'):
+        ParallelSearchAgent.__init__(self, evalFn, depth, workers, split, True)
+
+class BatchExpectimaxAgent(MultiAgentSearchAgent):
+    """
+    Expectimax that builds the whole tree to self.depth first and evaluates
+    all its leaves in one call to the evaluation function's evaluateBatch
+    (see featureEvaluation.py), or one by one if it has none.  Values and
+    actions are those of a depth-first expectimax.
+    """
+
+    def getAction(self, gameState):
+        numAgents = gameState.getNumAgents()
+        leaves = []
+
+        def expand(state, agent, plies):
+            # A leaf is its index in leaves; an inner node is (agent, children)
+            if plies == 0 or state.isWin() or state.isLose():
+                leaves.append(state)
+                return len(leaves) - 1
+            return (agent, [expand(state.generateSuccessor(agent, action), (agent + 1) % numAgents, plies - 1)
+                            for action in state.getLegalActions(agent)])
+
+        actions = gameState.getLegalActions(0)
+        if not actions:
+            return Directions.STOP
+        plies = self.depth * numAgents
+        children = [expand(gameState.generateSuccessor(0, action), 1 % numAgents, plies - 1)
+                    for action in actions]
+        if hasattr(self.evaluationFunction, 'evaluateBatch'):
+            leafValues = self.evaluationFunction.evaluateBatch(leaves)
+        else:
+            leafValues = [self.evaluationFunction(state) for state in leaves]
+
+        def backUp(node):
+            if isinstance(node, int):
+                return leafValues[node]
+            agent, nodeChildren = node
+            values = [backUp(child) for child in nodeChildren]
+            if agent == 0:
+                return max(values)
+            return sum(values) / float(len(values))
+
+        values = [backUp(child) for child in children]
+        return actions[values.index(max(values))]
+
+class StarExpectimaxAgent(MultiAgentSearchAgent):
+    """
+    An expectimax agent that prunes chance nodes with Star1 or Star2
+    (Ballard 1983; Hauk, Buro & Schaeffer 2004), using the bounds
+    [L, U] from getEvaluationBounds.
+
+    Star1: a ghost node with n equally likely moves is an average, so
+    after some children are searched, the unsearched ones can move it by
+    at most L or U each.  Each child is searched with the window its value
+    would have to leave for the average to leave (alpha, beta), and the
+    node returns a bound as soon as one does.
+
+    Star2: when Pacman moves next, searching just his first move in each
+    child gives a lower bound on that child, and the node fails high if
+    those lower bounds alone reach beta.  Otherwise the probes replace L in
+    the Star1 windows and are not searched again.  Without move ordering
+    the probes rarely cut, so Star2 pays off less than Star1 here; it is
+    kept for evaluation functions with tighter bounds.
+
+    Chosen actions and root values are those of plain expectimax;
+    pruning=none searches without pruning, to compare.  self.nodes counts
+    the states searched.
+    """
+
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='2', evalMin='-inf', evalMax='inf',
+                 pruning='star1'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, evalMin, evalMax)
+        if pruning not in ['none', 'star1', 'star2']:
+            raise Exception('pruning must be none, star1 or star2, not ' + pruning)
+        self.pruning = pruning
+        self.nodes = 0
+
+    def getAction(self, gameState):
+        self.lowest, self.highest = self.getEvaluationBounds(gameState)
+        if self.pruning == 'none':
+            self.lowest, self.highest = -float('inf'), float('inf')
+        self.numAgents = gameState.getNumAgents()
+        plies = self.depth * self.numAgents
+        bestValue, bestAction = -float('inf'), Directions.STOP
+        for action in gameState.getLegalActions(0):
+            value = self.search(gameState.generateSuccessor(0, action), 1 % self.numAgents, plies - 1,
+                                max(bestValue, self.lowest), self.highest)
+            if value > bestValue:
+                bestValue, bestAction = value, action
+        self.value = bestValue
+        return bestAction
+
+    def search(self, state, agent, plies, alpha, beta):
+        """
+        Returns the expectimax value of state if it lies in (alpha, beta), an
+        upper bound at most alpha if the value does, or a lower bound at least
+        beta if the value does.
+        """
+        self.nodes += 1
+        if plies == 0 or state.isWin() or state.isLose():
+            return self.evaluationFunction(state)
+        if agent == 0:
+            return self.maxValue(state, plies, alpha, beta)
+
+        nextAgent = (agent + 1) % self.numAgents
+        successors = [state.generateSuccessor(agent, action) for action in state.getLegalActions(agent)]
+        if self.pruning == 'none':
+            return sum(self.search(successor, nextAgent, plies - 1, alpha, beta)
+                       for successor in successors) / float(len(successors))
+        lowerBounds = [self.lowest] * len(successors)
+        probes = None
+        if self.pruning == 'star2' and nextAgent == 0 and plies > 1:
+            probes = [None] * len(successors)
+            result = self.probe(successors, plies - 1, beta, lowerBounds, probes)
+            if result is not None:
+                return result
+        return self.star1(successors, nextAgent, plies - 1, alpha, beta, lowerBounds, probes)
+
+    def maxValue(self, state, plies, alpha, beta, firstValue=None):
+        """
+        The Pacman node case of search.  firstValue, if given, is the value of
+        Pacman's first action found by a probe, which is then not searched
+        again: exact, or a lower bound if it is at least beta.
+        """
+        bestValue = -float('inf')
+        for i, action in enumerate(state.getLegalActions(0)):
+            if i == 0 and firstValue is not None:
+                value = firstValue
+            else:
+                value = self.search(state.generateSuccessor(0, action), 1 % self.numAgents, plies - 1,
+                                    max(alpha, bestValue), beta)
+            bestValue = max(bestValue, value)
+            if bestValue >= beta:
+                break
+        return bestValue
+
+    def star1(self, successors, agent, plies, alpha, beta, lowerBounds, probes=None):
+        "Averages the successors' values, cutting off once the average must leave (alpha, beta)."
+        n = len(successors)
+        total = 0.0
+        for i, successor in enumerate(successors):
+            remaining = n - i - 1
+            highRest = self.highest * remaining if remaining else 0.0
+            lowRest = sum(lowerBounds[i + 1:]) if remaining else 0.0
+            childAlpha = max(self.lowest, n * alpha - total - highRest)
+            childBeta = min(self.highest, n * beta - total - lowRest)
+            if probes is not None and probes[i] is not None and \
+               not (successor.isWin() or successor.isLose()):
+                self.nodes += 1
+                value = self.maxValue(successor, plies, childAlpha, childBeta, probes[i])
+            else:
+                value = self.search(successor, agent, plies, childAlpha, childBeta)
+            total += value
+            if value <= childAlpha and childAlpha > self.lowest:
+                return (total + highRest) / n
+            if value >= childBeta and childBeta < self.highest:
+                return (total + lowRest) / n
+        return total / n
+
+    def probe(self, successors, plies, beta, lowerBounds, probes):
+        """
+        Searches Pacman's first move in each successor, filling in lowerBounds
+        with the lower bounds that gives; returns a bound at least beta if they
+        prove the average reaches beta, or None.  Probe values that the Star1
+        pass can reuse (exact ones, and lower bounds that will cut off there
+        too) are left in probes.
+        """
+        n = len(successors)
+        for i, successor in enumerate(successors):
+            if successor.isWin() or successor.isLose():
+                self.nodes += 1
+                lowerBounds[i] = self.evaluationFunction(successor)
+            else:
+                rest = sum(lowerBounds[:i]) + (self.lowest * (n - i - 1) if n - i - 1 else 0.0)
+                probeBeta = min(self.highest, n * beta - rest)
+                first = successor.getLegalActions(0)[0]
+                self.nodes += 1
+                value = self.search(successor.generateSuccessor(0, first), 1 % self.numAgents, plies - 1,
+                                    self.lowest, probeBeta)
+                lowerBounds[i] = max(self.lowest, value)
+                if value < probeBeta:
+                    probes[i] = lowerBounds[i]
+                elif value >= self.highest:
+                    probes[i] = value
+            bound = sum(lowerBounds[:i + 1]) + (self.lowest * (n - i - 1) if n - i - 1 else 0.0)
+            if bound >= n * beta:
+                return bound / n
+        return None
+
+def legalMoveTable(walls):
+    """
+    Returns {position: [(action, vector), ...]}, the moves from every open
+    cell of walls, in the order Actions.getPossibleActions lists them.
+    """
+    from game import Actions
+    table = {}
+    for x in range(walls.width):
+        for y in range(walls.height):
+            if not walls[x][y]:
+                table[(x, y)] = [(action, vector) for action, vector in Actions._directionsAsList
+                                 if not walls[x + vector[0]][y + vector[1]]]
+    return table
+
+class Rollout:
+    """
+    A bare copy of a game state for playing out random games, with the
+    rules of pacman.py applied to plain lists and sets.  A step costs a few
+    tuple operations instead of the GameState copy (and the hashing into
+    GameState.explored) that generateSuccessor does.
+
+    moves is the legalMoveTable of the layout.
+    """
+
+    def __init__(self, gameState, moves):
+        data = gameState.data
+        self.moves = moves
+        self.positions = [agent.configuration.pos for agent in data.agentStates]
+        self.directions = [agent.configuration.direction for agent in data.agentStates]
+        self.scared = [agent.scaredTimer for agent in data.agentStates]
+        self.starts = [(agent.start.pos, agent.start.direction) for agent in data.agentStates]
+        self.food = set(data.food.asList())
+        self.capsules = set(data.capsules)
+        self.score = data.score
+        self.win, self.lose = data._win, data._lose
+
+    def copy(self):
+        rollout = copy.copy(self)
+        rollout.positions = self.positions[:]
+        rollout.directions = self.directions[:]
+        rollout.scared = self.scared[:]
+        rollout.food = set(self.food)
+        rollout.capsules = set(self.capsules)
+        return rollout
+
+    def isOver(self):
+        return self.win or self.lose
+
+    def pacmanMoves(self):
+        "Returns Pacman's legal (action, vector) pairs."
+        return self.moves[self.positions[0]]
+
+    def ghostMoves(self, agent):
+        "Returns a ghost's legal (action, vector) pairs: no stopping, no reversing unless stuck."
+        x, y = self.positions[agent]
+        xInt, yInt = int(x + 0.5), int(y + 0.5)
+        if abs(x - xInt) + abs(y - yInt) > Actions.TOLERANCE:
+            direction = self.directions[agent]
+            return [(direction, Actions._directions[direction])]
+        reverse = Actions.reverseDirection(self.directions[agent])
+        moves = [move for move in self.moves[(xInt, yInt)] if move[0] != Directions.STOP]
+        if len(moves) > 1:
+            moves = [move for move in moves if move[0] != reverse] or moves
+        return moves
+
+    def movePacman(self, action, vector):
+        x, y = self.positions[0]
+        position = (x + vector[0], y + vector[1])
+        self.positions[0] = position
+        if action != Directions.STOP:
+            self.directions[0] = action
+        if position in self.food:
+            self.food.remove(position)
+            self.score += 10
+            if not self.food and not self.lose:
+                self.score += 500
+                self.win = True
+        if position in self.capsules:
+            self.capsules.remove(position)
+            for agent in range(1, len(self.scared)):
+                self.scared[agent] = SCARED_TIME
+        self.score -= TIME_PENALTY
+        for agent in range(1, len(self.positions)):
+            self.checkCollision(agent)
+
+    def moveGhost(self, agent, action, vector):
+        x, y = self.positions[agent]
+        timer = self.scared[agent]
+        speed = 0.5 if timer > 0 else 1
+        position = (x + vector[0] * speed, y + vector[1] * speed)
+        self.directions[agent] = action
+        if timer == 1:
+            position = (int(position[0] + 0.5), int(position[1] + 0.5))
+        self.positions[agent] = position
+        self.scared[agent] = max(0, timer - 1)
+        self.checkCollision(agent)
+
+    def checkCollision(self, agent):
+        (x, y), (gx, gy) = self.positions[0], self.positions[agent]
+        if abs(x - gx) + abs(y - gy) <= COLLISION_TOLERANCE:
+            if self.scared[agent] > 0:
+                self.score += 200
+                self.positions[agent], self.directions[agent] = self.starts[agent]
+                self.scared[agent] = 0
+            elif not self.win:
+                self.score -= 500
+                self.lose = True
+
+    def playRound(self, action, vector, rand):
+        "Moves Pacman, then every ghost uniformly at random (as RandomGhost does)."
+        self.movePacman(action, vector)
+        for agent in range(1, len(self.positions)):
+            if self.win or self.lose:
+                return
+            self.moveGhost(agent, *rand.choice(self.ghostMoves(agent)))
+
+    def randomMove(self, rand):
+        "Returns a random move for Pacman, stopping only if he must."
+        moves = [move for move in self.pacmanMoves() if move[0] != Directions.STOP]
+        return rand.choice(moves or self.pacmanMoves())
+
+    def greedyMove(self, rand, epsilon=0.1):
+        """
+        Returns a move for Pacman that does not step next to a ghost that can
+        eat him and, if it can, eats something, breaking ties at random; with
+        probability epsilon, a random move.
+        """
+        if rand.random() < epsilon:
+            return self.randomMove(rand)
+        x, y = self.positions[0]
+        dangers = [self.positions[agent] for agent in range(1, len(self.positions)) if self.scared[agent] <= 1]
+        safe, eating = [], []
+        for move in self.pacmanMoves():
+            if move[0] == Directions.STOP:
+                continue
+            position = (x + move[1][0], y + move[1][1])
+            if any(abs(position[0] - gx) + abs(position[1] - gy) <= 1 + COLLISION_TOLERANCE
+                   for gx, gy in dangers):
+                continue
+            safe.append(move)
+            if position in self.food or position in self.capsules:
+                eating.append(move)
+        return rand.choice(eating or safe or self.pacmanMoves())
+
+    def playout(self, policy, rounds, rand):
+        "Plays up to rounds rounds, Pacman following policy (random or greedy); returns the value."
+        chooseMove = self.greedyMove if policy == 'greedy' else self.randomMove
+        while rounds > 0 and not (self.win or self.lose):
+            self.playRound(*chooseMove(rand), rand=rand)
+            rounds -= 1
+        return self.value()
+
+    def value(self):
+        """
+        Returns the score, less the distance to the nearest food if the game
+        goes on, so that playouts that end nearer food count for a little more.
+        """
+        if self.win or self.lose or not self.food:
+            return self.score
+        x, y = self.positions[0]
+        return self.score - min(abs(x - fx) + abs(y - fy) for fx, fy in self.food)
+
+class MCTSNode:
+    """
+    A node of the MCTS tree: the game after a sequence of Pacman actions,
+    averaged over the ghost moves sampled on the way (an open-loop tree, so
+    a node does not stand for a single state).  Pacman's position after
+    the actions is always the same, so so are his legal actions.
+    """
+
+    def __init__(self, action, position):
+        self.action = action
+        self.position = position
+        self.children = {}
+        self.untried = None
+        self.visits = 0
+        self.total = 0.0
+
+class MCTSAgent(Agent):
+    """
+    Monte Carlo tree search (UCT) with Rollout playouts.
+
+    Each simulation walks down the tree of Pacman actions by the UCB1 rule,
+    sampling the ghosts' moves at random, adds one node, then plays the game
+    out for up to rolloutDepth rounds under the rollout policy (random or
+    greedy) and backs up the score gained.  Simulations run until timeLimit
+    seconds have passed or, if it is set, simulations simulations are done;
+    the most visited action is played.
+
+    The subtree of the action played is kept for the next move.  With
+    workers above 1, that many trees are grown from the same state on a
+    pool of processes (root parallelization) and their root statistics are
+    summed.  Tree i is kept by the process that grew it and is reused only
+    if that process also gets task i on the next move; any process may get
+    any task, but each tree is grown by one task per move, so no
+    simulation is counted twice.  exploration scales the UCB1 bonus by the
+    range of scores seen.
+    """
+
+    def __init__(self, timeLimit='0.5', simulations='0', rolloutDepth='20', policy='greedy',
+                 exploration='1.0', reuse=True, workers='1', seed=None):
+        Agent.__init__(self, 0)
+        if policy not in ['random', 'greedy']:
+            raise Exception('policy must be random or greedy, not ' + policy)
+        self.timeLimit = float(timeLimit)
+        self.simulations = int(simulations)
+        self.rolloutDepth = int(rolloutDepth)
+        self.policy = policy
+        self.exploration = float(exploration)
+        self.reuse = reuse not in [False, 'False', '0']
+        self.workers = int(workers)
+        self.random = random.Random(None if seed is None else int(seed))
+        self.seed = seed
+        self.moves = None
+        self.root = None
+        self.lastAction = None
+        self.moveNumber = 0
+        self.pool = None
+
+    def registerInitialState(self, gameState):
+        self.moves = None
+        self.root = None
+        self.lastAction = None
+
+    def getAction(self, gameState):
+        if self.workers > 1:
+            if self.pool is None:
+                self.startPool(gameState)
+            settings = (self.timeLimit, self.simulations, self.rolloutDepth, self.policy,
+                        self.exploration, self.reuse)
+            self.moveNumber += 1
+            tasks = [(packState(gameState), (i, self.moveNumber, self.lastAction), settings,
+                      self.random.getrandbits(32)) for i in range(self.workers)]
+            statistics = {}
+            for result in self.pool.map(_workerSearch, tasks):
+                for action, (visits, total) in result.items():
+                    oldVisits, oldTotal = statistics.get(action, (0, 0.0))
+                    statistics[action] = (oldVisits + visits, oldTotal + total)
+        else:
+            statistics = self.search(gameState)
+        if not statistics:
+            return Directions.STOP
+        action = max(statistics, key=lambda a: (statistics[a][0], statistics[a][1] / statistics[a][0]))
+        self.lastAction = action
+        return action
+
+    def search(self, gameState):
+        "Grows the tree from gameState; returns {action: (visits, total score gained)} at the root."
+        if self.moves is None:
+            self.moves = legalMoveTable(gameState.getWalls())
+        rollout = Rollout(gameState, self.moves)
+        root = self.root
+        if root is not None and self.lastAction is not None:
+            root = root.children.get(self.lastAction)
+        if not self.reuse or root is None or root.position != rollout.positions[0]:
+            root = MCTSNode(None, rollout.positions[0])
+        self.root = root
+        self.lastAction = None
+        self.low, self.high = float('inf'), -float('inf')
+
+        deadline = time.time() + self.timeLimit
+        count = 0
+        while not (self.simulations and count >= self.simulations) and \
+              (count == 0 or time.time() < deadline):
+            self.simulate(root, rollout.copy(), rollout.value())
+            count += 1
+        self.count = count
+        return dict((action, (child.visits, child.total)) for action, child in root.children.items())
+
+    def simulate(self, root, rollout, baseScore):
+        "Runs one simulation from root on rollout, a copy of the root state."
+        node, path, rand = root, [root], self.random
+        while not rollout.isOver():
+            if node.untried is None:
+                node.untried = rollout.pacmanMoves()[:]
+                rand.shuffle(node.untried)
+            if node.untried:
+                action, vector = node.untried.pop()
+                rollout.playRound(action, vector, rand)
+                child = node.children[action] = MCTSNode(action, rollout.positions[0])
+                path.append(child)
+                break
+            node = self.select(node)
+            rollout.playRound(node.action, Actions._directions[node.action], rand)
+            path.append(node)
+        value = rollout.playout(self.policy, self.rolloutDepth, rand) - baseScore
+        self.low, self.high = min(self.low, value), max(self.high, value)
+        for node in path:
+            node.visits += 1
+            node.total += value
+
+    def select(self, node):
+        "Returns the child of node with the highest UCB1 value."
+        scale = self.exploration * max(self.high - self.low, 1.0)
+        logVisits = math.log(node.visits)
+        bestValue, bestChild = -float('inf'), None
+        for child in node.children.values():
+            value = child.total / child.visits + scale * math.sqrt(logVisits / child.visits)
+            if value > bestValue:
+                bestValue, bestChild = value, child
+        return bestChild
+
+    def startPool(self, gameState):
+        import multiprocessing
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing.get_context()
+        self.pool = context.Pool(self.workers, _initWorker,
+                                 (gameState.data.layout, gameState.getNumAgents(), None, False))
+
+    def final(self, state):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+# The trees a worker process keeps between the moves of a root-parallel
+# MCTSAgent: {tree index: (move number, MCTSAgent)}
+_workerTrees = {}
+
+def _workerSearch(task):
+    packed, (index, moveNumber, lastAction), settings, seed = task
+    gameState = unpackState(packed, _workerContext[0])
+    for i in list(_workerTrees):
+        if _workerTrees[i][0] < moveNumber - 1:
+            del _workerTrees[i]
+    previous = _workerTrees.get(index)
+    if previous is not None and previous[0] == moveNumber - 1 and lastAction is not None:
+        agent = previous[1]
+        agent.lastAction = lastAction
+    else:
+        agent = MCTSAgent(*settings)
+    _workerTrees[index] = (moveNumber, agent)
+    agent.random.seed(seed)
+    return agent.search(gameState)
+
+def sampleStates(layoutName, numStates, numGhosts=2, seed=0):
+    "Returns numStates game states from a random walk on a layout, reproducibly."
+    import random
+    import layout
+    import pacman
+    rand = random.Random(seed)
+    state = pacman.GameState()
+    state.initialize(layout.getLayout(layoutName), numGhosts)
+    start, states = state, []
+    while len(states) < numStates:
+        for agent in range(state.getNumAgents()):
+            if state.isWin() or state.isLose():
+                state = start
+                break
+            state = state.generateSuccessor(agent, rand.choice(state.getLegalActions(agent)))
+        if rand.random() < 0.3 and not (state.isWin() or state.isLose()):
+            states.append(state)
+    return states
+
+def orderingBenchmark(states, depth, orderings, evalFn='scoreEvaluationFunction'):
+    """
+    Returns {ordering: nodes}, the nodes each move ordering needs to search
+    every state to depth (iterating from depth 1, with a fresh table per state).
+    """
+    counts = {}
+    for ordering in orderings:
+        agent = IterativeDeepeningAgent(evalFn, depth, 'inf', ordering=ordering)
+        for state in states:
+            agent.table = {}
+            agent.getAction(state)
+        counts[ordering] = agent.nodes
+    return counts
+
+if __name__ == '__main__':
+    import sys
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python adversarialAgents.py <options>')
+    parser.add_option('-l', '--layout', dest='layout', default='mediumClassic',
+                      help='the LAYOUT to sample states from', metavar='LAYOUT')
+    parser.add_option('-d', '--depth', dest='depth', type='int', default=5,
+                      help='the search depth')
+    parser.add_option('-n', '--states', dest='states', type='int', default=10,
+                      help='the number of sampled states')
+    parser.add_option('-k', '--numghosts', dest='numGhosts', type='int', default=2,
+                      help='the number of ghosts')
+    parser.add_option('--evalFn', dest='evalFn', default='scoreEvaluationFunction',
+                      help='the evaluation function from multiAgents.py')
+    options, otherjunk = parser.parse_args(sys.argv[1:])
+
+    states = sampleStates(options.layout, options.states, options.numGhosts)
+    orderings = ['none', 'table', 'table,killers', 'table,killers,history', 'table,killers,history,static']
+    counts = orderingBenchmark(states, options.depth, orderings, options.evalFn)
+    for ordering in orderings:
+        print('%-30s nodes %10d  %5.1f%% of unordered' %
+              (ordering, counts[ordering], 100.0 * counts[ordering] / counts['none']))
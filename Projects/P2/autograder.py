@@ -82,6 +82,11 @@ def readCommand(argv):
                       dest='noGraphics',
                       action='store_true',
                       help='No graphics display for pacman games.')
+    parser.add_option('--workers',
+                      dest='workers',
+                      type='int',
+                      default=None,
+                      help='Processes to play graded games on (0 for one per CPU, 1 for none).')
     (options, args) = parser.parse_args(argv)
     return options
 
@@ -352,6 +357,8 @@ if __name__ == '__main__':
     moduleName = re.match('.*?([^/]*)\.py', options.testCaseCode).group(1)
     moduleDict['projectTestClasses'] = loadModuleFile(
         moduleName, os.path.join(options.codeRoot, options.testCaseCode))
+    if options.workers is not None:
+        moduleDict['projectTestClasses'].GAME_WORKERS = options.workers
 
     if options.runTest != None:
         runTest(options.runTest, moduleDict, printTestCase=options.printTestCase,
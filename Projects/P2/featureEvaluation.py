@@ -0,0 +1,235 @@
+# featureEvaluation.py
+# --------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Evaluation functions built from declared features.
+
+A FeatureEvaluation is a weighted sum of features, each named in FEATURES
+and computed from a game state and the LayoutData of its layout: maze
+distances and sorted cell orders, found once per source cell and kept for
+every state of the layout.  The feature values of a state are memoized
+under featureKey, so the many leaves of a search that share a position
+cost one lookup.  The score, which depends on the path to a state and not
+just on the state, is read from the state every time.
+
+evaluateBatch evaluates a list of states together, computing the features
+of each distinct key once; BatchExpectimaxAgent (adversarialAgents.py)
+hands it all the leaves of its tree at once.  A FeatureEvaluation is an
+evaluation function like any other:
+
+> python pacman.py -p ExpectimaxAgent -a evalFn=featureEvaluation.featureEvaluationFunction
+"""
+
+from game import Actions
+from util import nearestPoint
+
+class LayoutData:
+    """
+    Data about the walls of a layout that every state of the layout shares.
+    Breadth first searches are run lazily, once per source cell.
+    """
+
+    def __init__(self, walls):
+        self.walls = walls
+        self.searches = {}
+
+    def search(self, source):
+        """
+        Returns (distances, order): the maze distance of every cell reachable
+        from source, and those cells in order of distance.
+        """
+        if source not in self.searches:
+            distances, order, i = {source: 0}, [source], 0
+            while i < len(order):
+                cell = order[i]
+                for neighbor in Actions.getLegalNeighbors(cell, self.walls):
+                    if neighbor not in distances:
+                        distances[neighbor] = distances[cell] + 1
+                        order.append(neighbor)
+                i += 1
+            self.searches[source] = (distances, order)
+        return self.searches[source]
+
+    def distance(self, source, target):
+        "Returns the maze distance between two cells, or None if there is no path."
+        return self.search(nearestPoint(source))[0].get(nearestPoint(target))
+
+    def nearest(self, source, grid):
+        "Returns the maze distance from source to the nearest cell set in grid, or None."
+        distances, order = self.search(nearestPoint(source))
+        for x, y in order:
+            if grid[x][y]:
+                return distances[(x, y)]
+        return None
+
+# LayoutData by walls, shared by every FeatureEvaluation
+_layoutData = {}
+
+def layoutData(walls):
+    "Returns the LayoutData of walls, building it the first time those walls are seen."
+    if walls not in _layoutData:
+        _layoutData[walls] = LayoutData(walls)
+    return _layoutData[walls]
+
+def featureKey(gameState, foodKey=None):
+    """
+    Returns a compact key for what the features see of a state: agent
+    positions and scared timers, the food and the capsules.  foodKey, the
+    food part, may be passed in if it is already known.
+    """
+    data = gameState.data
+    if foodKey is None:
+        foodKey = b''.join(map(bytes, data.food.data))
+    agents = tuple((agent.configuration.pos, agent.scaredTimer) for agent in data.agentStates)
+    return (agents, foodKey, tuple(data.capsules))
+
+#########################
+# Features              #
+#########################
+
+def numFood(state, data):
+    return state.getNumFood()
+
+def foodDistance(state, data):
+    "Maze distance to the nearest food (0 with none left)."
+    return data.nearest(state.getPacmanPosition(), state.getFood()) or 0
+
+def numCapsules(state, data):
+    return len(state.getCapsules())
+
+def capsuleDistance(state, data):
+    "Maze distance to the nearest capsule (0 with none left)."
+    pacman = state.getPacmanPosition()
+    distances = [data.distance(pacman, capsule) for capsule in state.getCapsules()]
+    return min([d for d in distances if d is not None] or [0])
+
+def ghostsNear(state, data):
+    "Ghosts that are not scared and are within two moves of Pacman."
+    pacman = state.getPacmanPosition()
+    near = 0
+    for ghost in state.getGhostStates():
+        if ghost.scaredTimer == 0:
+            d = data.distance(pacman, ghost.getPosition())
+            if d is not None and d <= 2:
+                near += 1
+    return near
+
+def scaredGhostReach(state, data):
+    "For each scared ghost, the moves by which Pacman can reach it before it recovers."
+    pacman = state.getPacmanPosition()
+    reach = 0
+    for ghost in state.getGhostStates():
+        if ghost.scaredTimer > 0:
+            d = data.distance(pacman, ghost.getPosition())
+            if d is not None:
+                reach += max(0, ghost.scaredTimer - d)
+    return reach
+
+FEATURES = {
+    'numFood': numFood,
+    'foodDistance': foodDistance,
+    'numCapsules': numCapsules,
+    'capsuleDistance': capsuleDistance,
+    'ghostsNear': ghostsNear,
+    'scaredGhostReach': scaredGhostReach,
+}
+
+class FeatureEvaluation:
+    """
+    An evaluation function: weights['score'] times the score plus the
+    weighted sum of the other features in weights, all names from FEATURES.
+    Memoized feature values are dropped once there are maxEntries of them.
+
+    Successor states share their parent's food columns until food is eaten,
+    so the food part of each key is found once per list of columns and kept
+    (with the list, so that its id is not reused) in foodKeys.
+    """
+
+    def __init__(self, weights, maxEntries=100000):
+        for name in weights:
+            if name != 'score' and name not in FEATURES:
+                raise Exception('Unknown feature ' + name)
+        self.scoreWeight = weights.get('score', 0.0)
+        self.names = [name for name in sorted(weights) if name != 'score']
+        self.weights = [weights[name] for name in self.names]
+        self.functions = [FEATURES[name] for name in self.names]
+        self.maxEntries = maxEntries
+        self.memo = {}
+        self.foodKeys = {}
+        self.walls, self.data = None, None
+        self.hits = self.misses = 0
+
+    def layoutData(self, gameState):
+        "Returns the LayoutData of gameState; memoized values are dropped when the layout changes."
+        walls = gameState.data.layout.walls
+        if walls is not self.walls:
+            self.walls, self.data = walls, layoutData(walls)
+            self.memo.clear()
+            self.foodKeys.clear()
+        return self.data
+
+    def key(self, gameState):
+        "Returns the featureKey of gameState."
+        food = gameState.data.food.data
+        entry = self.foodKeys.get(id(food))
+        if entry is None or entry[0] is not food:
+            if len(self.foodKeys) >= self.maxEntries:
+                self.foodKeys.clear()
+            entry = self.foodKeys[id(food)] = (food, b''.join(map(bytes, food)))
+        return featureKey(gameState, entry[1])
+
+    def weightedSum(self, gameState, key):
+        "Returns the weighted sum of the features of gameState, whose featureKey is key."
+        data = self.layoutData(gameState)
+        value = self.memo.get(key)
+        if value is None:
+            self.misses += 1
+            if len(self.memo) >= self.maxEntries:
+                self.memo.clear()
+            value = sum(weight * function(gameState, data)
+                        for weight, function in zip(self.weights, self.functions))
+            self.memo[key] = value
+        else:
+            self.hits += 1
+        return value
+
+    def features(self, gameState):
+        "Returns {name: value} for every feature, including the score."
+        data = self.layoutData(gameState)
+        features = dict((name, function(gameState, data)) for name, function in zip(self.names, self.functions))
+        features['score'] = gameState.getScore()
+        return features
+
+    def __call__(self, gameState):
+        return self.scoreWeight * gameState.getScore() + self.weightedSum(gameState, self.key(gameState))
+
+    def evaluateBatch(self, gameStates):
+        "Returns the evaluations of gameStates, computing the features of each distinct state once."
+        keys = [self.key(state) for state in gameStates]
+        sums = {}
+        for state, key in zip(gameStates, keys):
+            if key not in sums:
+                sums[key] = self.weightedSum(state, key)
+        return [self.scoreWeight * state.getScore() + sums[key] for state, key in zip(gameStates, keys)]
+
+DEFAULT_WEIGHTS = {
+    'score': 1.0,
+    'foodDistance': -1.5,
+    'numCapsules': -20.0,
+    'capsuleDistance': -0.5,
+    'ghostsNear': -200.0,
+    'scaredGhostReach': 2.0,
+}
+
+featureEvaluationFunction = FeatureEvaluation(DEFAULT_WEIGHTS)
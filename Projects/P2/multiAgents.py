@@ -72,6 +72,37 @@ def scoreEvaluationFunction(currentGameState):
     """
     return currentGameState.getScore()
 
+def scoreBounds(currentGameState, depth):
+    """
+    Returns (lowest, highest) scores reachable within depth moves of each
+    agent from currentGameState, for scoreEvaluationFunction.  Each Pacman
+    move costs a point and eats at most one dot, and the game is won when
+    the last dot is eaten.  The game can only be lost to a ghost close
+    enough to meet Pacman in time, and ghosts can only be eaten if they are
+    close enough and scared now, or after a capsule close enough to reach.
+    """
+    score = currentGameState.getScore()
+    pacman = currentGameState.getPacmanPosition()
+    numFood = currentGameState.getNumFood()
+    # Pacman and a ghost each move depth times, and collide within 0.7
+    nearGhosts = [ghost for ghost in currentGameState.getGhostStates()
+                  if manhattanDistance(ghost.getPosition(), pacman) < 2 * depth + 1]
+    nearCapsules = [capsule for capsule in currentGameState.getCapsules()
+                    if manhattanDistance(capsule, pacman) <= depth]
+    ghostMeals = len([ghost for ghost in nearGhosts if ghost.scaredTimer > 0])
+    if nearCapsules:
+        ghostMeals += currentGameState.getNumAgents() * min(len(nearCapsules), depth)
+
+    lowest = score - depth
+    if nearGhosts:
+        lowest -= 500
+    highest = score + 10 * min(depth, numFood) - depth
+    if numFood <= depth:
+        highest = max(highest, score + 9 * numFood + 500)
+    return lowest, highest + 200 * ghostMeals
+
+scoreEvaluationFunction.bounds = scoreBounds
+
 class MultiAgentSearchAgent(Agent):
     """
     This class provides some common elements to all of your
@@ -87,10 +118,25 @@ class MultiAgentSearchAgent(Agent):
     is another abstract class.
     """
 
-    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2'):
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', evalMin = '-inf', evalMax = 'inf'):
         self.index = 0 # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        self.evalMin = float(evalMin)
+        self.evalMax = float(evalMax)
+
+    def getEvaluationBounds(self, gameState):
+        """
+        Returns (lowest, highest), bounds on the evaluation of every state a
+        search of self.depth from gameState can reach; searches may prune on
+        them, so they must hold.  They are the evalMin and evalMax arguments
+        when those are given, else the evaluation function's bounds attribute
+        (a function of the state and depth) if it has one.
+        """
+        lowest, highest = -float('inf'), float('inf')
+        if hasattr(self.evaluationFunction, 'bounds'):
+            lowest, highest = self.evaluationFunction.bounds(gameState, self.depth)
+        return max(lowest, self.evalMin), min(highest, self.evalMax)
 
 class MinimaxAgent(MultiAgentSearchAgent):
     """
@@ -23,6 +23,7 @@
 import testClasses
 import json
 
+from array import array
 from collections import defaultdict
 from pprint import PrettyPrinter
 pp = PrettyPrinter()
@@ -32,6 +33,7 @@ from pacman import GameState
 from ghostAgents import RandomGhost, DirectionalGhost
 import random
 import math
+import copy
 import traceback
 import sys
 import os
@@ -141,6 +143,256 @@ def parseTreeProblem(testDict):
     return MultiagentTreeProblem(numAgents, startState, winStates, loseStates, successors, evaluation)
 
 
+class CompiledTree(object):
+    """
+    A game tree in flat arrays, for running search agents on trees far
+    larger than the hand-written ones.  Nodes are the integers 0..size-1,
+    with 0 the root; the children of node i are
+    children[first[i]:first[i + 1]], reached by the actions
+    edgeActions[first[i]:first[i + 1]].  value[i] is node i's evaluation
+    and outcome[i] is WIN, LOSE or 0.  generated[i] is set when node i is
+    returned by generateSuccessor (the root counts as generated), and
+    numGenerated counts the calls, so search effort is measured without
+    hashing a single state.  Children are numbered after their parents,
+    which both builders below ensure.
+    """
+    WIN, LOSE = 1, 2
+
+    def __init__(self, numAgents, first, children, edgeActions, value, outcome):
+        self.numAgents = numAgents
+        self.first = first
+        self.children = children
+        self.edgeActions = edgeActions
+        self.value = value
+        self.outcome = outcome
+        self.size = len(value)
+        self.startState = CompiledTreeState(self, 0)
+        plies = array('i', [0]) * self.size
+        for node in range(self.size):
+            for edge in range(first[node], first[node + 1]):
+                plies[children[edge]] = plies[node] + 1
+        self.height = max(plies)
+        self.reset()
+
+    def reset(self):
+        self.generated = bytearray(self.size)
+        self.generated[0] = 1
+        self.numGenerated = 0
+
+    def allowRecursion(self):
+        "Raises the recursion limit enough for a recursive search to reach the deepest leaf."
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * self.height + 1000))
+
+    def generatedNodes(self):
+        "Returns the generated nodes, in increasing order."
+        return [node for node in range(self.size) if self.generated[node]]
+
+
+class CompiledTreeState(object):
+    "A node of a CompiledTree, with the interface of MultiagentTreeState."
+    __slots__ = ['tree', 'node']
+
+    def __init__(self, tree, node):
+        self.tree = tree
+        self.node = node
+
+    def generateSuccessor(self, agentIndex, action):
+        tree = self.tree
+        start, end = tree.first[self.node], tree.first[self.node + 1]
+        for edge in range(start, end):
+            if tree.edgeActions[edge] == action:
+                successor = tree.children[edge]
+                tree.generated[successor] = 1
+                tree.numGenerated += 1
+                return CompiledTreeState(tree, successor)
+        raise Exception('Illegal action %s at node %d' % (action, self.node))
+
+    def getScore(self):
+        return self.tree.value[self.node]
+
+    def getLegalActions(self, agentIndex=0):
+        tree = self.tree
+        return tree.edgeActions[tree.first[self.node]:tree.first[self.node + 1]]
+
+    def isWin(self):
+        return self.tree.outcome[self.node] == CompiledTree.WIN
+
+    def isLose(self):
+        return self.tree.outcome[self.node] == CompiledTree.LOSE
+
+    def getNumAgents(self):
+        return self.tree.numAgents
+
+
+def compileTreeProblem(problem):
+    """
+    Returns a MultiagentTreeProblem as a CompiledTree, numbering its states
+    breadth first from the start state, and the list of state names by node.
+    """
+    names = [problem.startState.state]
+    nodes = {names[0]: 0}
+    first, children, edgeActions = array('i', [0]), array('i'), []
+    i = 0
+    while i < len(names):
+        for action in problem.stateToActions[names[i]]:
+            successor = problem.stateToSuccessorMap[names[i]][action]
+            if successor not in nodes:
+                nodes[successor] = len(names)
+                names.append(successor)
+            children.append(nodes[successor])
+            edgeActions.append(action)
+        first.append(len(children))
+        i += 1
+    value = array('d', [float(problem.evaluation.get(name, 0.0)) for name in names])
+    outcome = bytearray(CompiledTree.WIN if name in problem.winStates else
+                        CompiledTree.LOSE if name in problem.loseStates else 0 for name in names)
+    return CompiledTree(problem.numAgents, first, children, edgeActions, value, outcome), names
+
+
+def randomTree(numAgents, depth, branching=(2, 4), terminalRate=0.05, maxNodes=1000000, seed=0):
+    """
+    Returns a random CompiledTree that searches of the given depth (moves by
+    every agent) can be run on: every node at depth * numAgents plies is a
+    leaf, and any other node is a win or loss with probability
+    terminalRate, or has between branching[0] and branching[1] children.
+    Nodes are expanded depth first, and once maxNodes nodes exist the nodes
+    still to be expanded are made wins or losses instead, so a small
+    maxNodes with a large depth gives a narrow tree thousands of plies deep.
+    Evaluations are integers in [-100, 100] and actions are named a0, a1, ...
+    """
+    rand = random.Random(seed)
+    plies = depth * numAgents
+    # The children of node i are the nodes childStart[i] .. childStart[i] + numChildren[i] - 1
+    ply, outcome, childStart, numChildren = [0], bytearray(1), [0], [0]
+    stack = [0]
+    while stack:
+        i = stack.pop()
+        if ply[i] == plies:
+            continue
+        if (i > 0 and rand.random() < terminalRate) or len(ply) >= maxNodes:
+            outcome[i] = rand.choice([CompiledTree.WIN, CompiledTree.LOSE])
+            continue
+        n = min(rand.randint(*branching), maxNodes - len(ply))
+        childStart[i], numChildren[i] = len(ply), n
+        ply.extend([ply[i] + 1] * n)
+        outcome.extend(bytearray(n))
+        childStart.extend([0] * n)
+        numChildren.extend([0] * n)
+        stack.extend(range(childStart[i] + n - 1, childStart[i] - 1, -1))
+
+    actionNames = ['a%d' % k for k in range(branching[1])]
+    first, children, edgeActions = array('i', [0]), array('i'), []
+    for i in range(len(ply)):
+        children.extend(range(childStart[i], childStart[i] + numChildren[i]))
+        edgeActions.extend(actionNames[:numChildren[i]])
+        first.append(len(children))
+    value = array('d', [float(rand.randint(-100, 100)) for node in ply])
+    return CompiledTree(numAgents, first, children, edgeActions, value, outcome)
+
+
+def referenceSearch(tree, alg, depth):
+    """
+    Runs the reference MinimaxAgent, AlphaBetaAgent or ExpectimaxAgent on
+    tree, marking the nodes it generates; returns (action, value).  Alpha-
+    beta generates successors one at a time and prunes only on strict
+    inequalities, as the project asks.
+    """
+    numAgents = tree.numAgents
+    start = tree.startState
+    tree.allowRecursion()
+
+    def search(state, agent, plies, alpha, beta):
+        if plies == 0 or state.isWin() or state.isLose():
+            return state.getScore(), None
+        nextAgent = (agent + 1) % numAgents
+        best, bestAction, total = None, None, 0.0
+        actions = state.getLegalActions(agent)
+        for action in actions:
+            value, _ = search(state.generateSuccessor(agent, action), nextAgent, plies - 1, alpha, beta)
+            if alg == 'ExpectimaxAgent' and agent != 0:
+                total += value
+                continue
+            if best is None or (value > best if agent == 0 else value < best):
+                best, bestAction = value, action
+            if alg == 'AlphaBetaAgent':
+                if agent == 0:
+                    if best > beta:
+                        break
+                    alpha = max(alpha, best)
+                else:
+                    if best < alpha:
+                        break
+                    beta = min(beta, best)
+        if alg == 'ExpectimaxAgent' and agent != 0:
+            return total / len(actions), None
+        return best, bestAction
+
+    value, action = search(start, 0, depth * numAgents, -float('inf'), float('inf'))
+    return action, value
+
+
+def profileTreeAgent(agent, tree):
+    """
+    Runs agent on tree from a fresh start; returns (action, seconds, nodes
+    generated, generateSuccessor calls).
+    """
+    tree.reset()
+    tree.allowRecursion()
+    startTime = time.time()
+    action = agent.getAction(tree.startState)
+    return action, time.time() - startTime, sum(tree.generated), tree.numGenerated
+
+
+class RandomTreeTest(testClasses.TestCase):
+    """
+    Runs a student agent on a random CompiledTree and checks its action and
+    the nodes it generated against referenceSearch.  The test file gives
+    alg, depth, num_agents and seed, and optionally min_branching,
+    max_branching, terminal_rate and max_nodes.
+    """
+
+    def __init__(self, question, testDict):
+        super(RandomTreeTest, self).__init__(question, testDict)
+        self.alg = testDict['alg']
+        self.depth = int(testDict['depth'])
+        branching = (int(testDict.get('min_branching', 2)), int(testDict.get('max_branching', 4)))
+        self.tree = randomTree(int(testDict['num_agents']), self.depth, branching,
+                               float(testDict.get('terminal_rate', 0.05)),
+                               int(testDict.get('max_nodes', 1000000)), int(testDict['seed']))
+
+    def execute(self, grades, moduleDict, solutionDict):
+        multiAgents = moduleDict['multiAgents']
+        tree = self.tree
+        tree.reset()
+        goldAction, goldValue = referenceSearch(tree, self.alg, self.depth)
+        goldGenerated = tree.generated
+        studentAgent = getattr(multiAgents, self.alg)(depth=self.depth)
+        action, seconds, generated, calls = profileTreeAgent(studentAgent, tree)
+        self.addMessage('%d node tree searched in %.3f seconds, %d nodes generated (reference %d)' %
+                        (tree.size, seconds, generated, sum(goldGenerated)))
+
+        fail = False
+        if action != goldAction:
+            self.addMessage('Incorrect move for depth=%s' % (self.depth,))
+            self.addMessage('    Student move: %s\n    Optimal move: %s (value %s)' % (action, goldAction, goldValue))
+            fail = True
+        if tree.generated != goldGenerated:
+            extra = [node for node in range(tree.size) if tree.generated[node] and not goldGenerated[node]]
+            missing = [node for node in range(tree.size) if goldGenerated[node] and not tree.generated[node]]
+            self.addMessage('Incorrect generated nodes for depth=%s: %d extra (first %s), %d missing (first %s)' %
+                            (self.depth, len(extra), extra[:5], len(missing), missing[:5]))
+            fail = True
+        if fail:
+            return self.testFail(grades)
+        return self.testPass(grades)
+
+    def writeSolution(self, moduleDict, filePath):
+        with open(filePath, 'w') as handle:
+            handle.write('# This is the solution file for %s.\n' % self.path)
+            handle.write('# File intentionally blank: the solution is computed by referenceSearch.\n')
+        return True
+
+
 def run(lay, layName, pac, ghosts, disp, nGames=1, name='games'):
     """
     Runs a few games and outputs their statistics.
@@ -159,6 +411,79 @@ def run(lay, layName, pac, ghosts, disp, nGames=1, name='games'):
     return stats
 
 
+# Processes EvalAgentTest plays its games on: 0 for one per CPU, 1 to play
+# them in the grading process.  Set by autograder.py --workers.
+GAME_WORKERS = 0
+
+
+def gameSeed(seed, index):
+    "Returns the random seed of game index in a run of games seeded with seed."
+    return random.Random('%d/%d' % (seed, index)).getrandbits(32)
+
+
+def playSeededGame(lay, makeAgent, ghosts, display, seed, timeout):
+    """
+    Plays one game from random.seed(seed), by a fresh agent from makeAgent
+    against copies of ghosts, both made after seeding; returns its outcome
+    as a dict with win, score, timeout and crash.  An agent that exits (as
+    util.raiseNotDefined does) has crashed.
+    """
+    random.seed(seed)
+    agent, ghosts = makeAgent(), copy.deepcopy(ghosts)
+    rules = pacman.ClassicGameRules(timeout)
+    game = rules.newGame(lay, agent, ghosts, display, False, True)
+    try:
+        game.run()
+    except SystemExit:
+        game.agentCrashed = True
+    return {'win': game.state.isWin(), 'score': game.state.getScore(),
+            'timeout': game.agentTimeout, 'crash': game.agentCrashed}
+
+
+# The games of the runSeededGames call in progress, for its worker processes
+_seededGames = None
+
+
+def _playSeededGame(index):
+    import textDisplay
+    lay, makeAgent, ghosts, seed, timeout = _seededGames
+    return playSeededGame(lay, makeAgent, ghosts, textDisplay.NullGraphics(), gameSeed(seed, index), timeout)
+
+
+def runSeededGames(lay, makeAgent, ghosts, display, numGames, seed, timeout, workers=1):
+    """
+    Plays numGames games, game i by a fresh agent from makeAgent against
+    copies of ghosts, from random seed gameSeed(seed, i), and returns their
+    statistics in the form run returns them ('games' holds the outcomes of
+    playSeededGame).  No game depends on another, so the outcomes are the
+    same whether the games are played here or on workers processes (0 for
+    one per CPU); they are played here if the display shows them, or if
+    the platform cannot fork the agent's module into the workers.
+    """
+    global _seededGames
+    import multiprocessing
+    import textDisplay
+    startTime = time.time()
+    workers = workers or multiprocessing.cpu_count()
+    parallel = workers > 1 and numGames > 1 and isinstance(display, textDisplay.NullGraphics) and \
+        'fork' in multiprocessing.get_all_start_methods()
+    if parallel:
+        _seededGames = (lay, makeAgent, ghosts, seed, timeout)
+        pool = multiprocessing.get_context('fork').Pool(min(workers, numGames))
+        try:
+            outcomes = pool.map(_playSeededGame, range(numGames))
+        finally:
+            pool.terminate()
+            _seededGames = None
+    else:
+        outcomes = [playSeededGame(lay, makeAgent, ghosts, display, gameSeed(seed, i), timeout)
+                    for i in range(numGames)]
+    return {'time': time.time() - startTime, 'wins': [o['win'] for o in outcomes].count(True),
+            'games': outcomes, 'scores': [o['score'] for o in outcomes],
+            'timeouts': [o['timeout'] for o in outcomes].count(True),
+            'crashes': [o['crash'] for o in outcomes].count(True)}
+
+
 class GradingAgent(Agent):
     def __init__(self, seed, studentAgent, optimalActions, altDepthActions, partialPlyBugActions):
         # save student agent and actions of refernce agents
@@ -186,9 +511,9 @@ class GradingAgent(Agent):
         random.seed(self.seed)
 
     def getAction(self, state):
-        GameState.getAndResetExplored()
-        studentAction = (self.studentAgent.getAction(state),
-                         len(GameState.getAndResetExplored()))
+        with GameState.countExploration() as counter:
+            studentAction = self.studentAgent.getAction(state)
+        studentAction = (studentAction, counter.uniqueStates)
         optimalActions = self.optimalActions[self.stepCount]
         altDepthActions = self.altDepthActions[self.stepCount]
         partialPlyBugActions = self.partialPlyBugActions[self.stepCount]
@@ -296,11 +621,11 @@ class PolyAgent(Agent):
 
     def getAction(self, state):
         # survey agents
-        GameState.getAndResetExplored()
         optimalActionLists = []
         for agent in self.solutionAgents:
-            optimalActionLists.append((agent.getBestPacmanActions(
-                state)[0], len(GameState.getAndResetExplored())))
+            with GameState.countExploration() as counter:
+                bestActions = agent.getBestPacmanActions(state)[0]
+            optimalActionLists.append((bestActions, counter.uniqueStates))
         alternativeDepthLists = [agent.getBestPacmanActions(
             state)[0] for agent in self.alternativeDepthAgents]
         partialPlyBugLists = [agent.getBestPacmanActions(
@@ -496,6 +821,7 @@ class EvalAgentTest(testClasses.TestCase):
         self.maxPoints = sum([len(t) for t in [
                              self.scoreThresholds, self.nonTimeoutThresholds, self.winsThresholds]])
         self.agentArgs = testDict.get('agentArgs', '')
+        self.workers = int(testDict.get('workers', GAME_WORKERS))
 
     def execute(self, grades, moduleDict, solutionDict):
         startTime = time.time()
@@ -503,20 +829,15 @@ class EvalAgentTest(testClasses.TestCase):
         agentType = getattr(moduleDict['multiAgents'], self.agentName)
         agentOpts = pacman.parseAgentArgs(
             self.agentArgs) if self.agentArgs != '' else {}
-        agent = agentType(**agentOpts)
 
         lay = layout.getLayout(self.layoutName, 3)
 
         disp = self.question.getDisplay()
 
-        random.seed(self.seed)
-        games = pacman.runGames(lay, agent, self.ghosts, disp, self.numGames,
-                                False, catchExceptions=True, timeout=self.maxTime)
-        totalTime = time.time() - startTime
-
-        stats = {'time': totalTime, 'wins': [g.state.isWin() for g in games].count(True),
-                 'games': games, 'scores': [g.state.getScore() for g in games],
-                 'timeouts': [g.agentTimeout for g in games].count(True), 'crashes': [g.agentCrashed for g in games].count(True)}
+        # Each game gets a fresh agent and its own seed, so games can run in parallel
+        stats = runSeededGames(lay, lambda: agentType(**agentOpts), self.ghosts, disp, self.numGames,
+                               self.seed, self.maxTime, self.workers)
+        stats['time'] = time.time() - startTime
 
         averageScore = sum(stats['scores']) / float(len(stats['scores']))
         nonTimeouts = self.numGames - stats['timeouts']
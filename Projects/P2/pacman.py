@@ -58,6 +58,65 @@ import os
 ###################################################
 
 
+class ExplorationCounter:
+    """
+    Counts the search done on GameStates while it is active, in place of
+    the GameState.explored set:
+
+      successors    calls to generateSuccessor
+      terminals     successors generated that are wins or losses
+      evaluations   calls to getScore
+      uniqueStates  distinct states among the states and successors of
+                    those calls: len(GameState.explored) for the same search
+
+    Distinct states are told apart by a compact key of the fields GameState
+    equality compares, with the food part found once per food grid (a
+    successor shares its parent's until food is eaten), instead of by
+    hashing each whole state.  With unique=False they are not counted.
+    Counters nest, and each counts everything done while it is active.
+    """
+
+    def __init__(self, unique=True):
+        self.successors = 0
+        self.terminals = 0
+        self.evaluations = 0
+        self.unique = unique
+        self.keys = set()
+        self.foodKeys = {}
+
+    def __enter__(self):
+        GameState.counters.append(self)
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        GameState.counters.remove(self)
+        self.foodKeys = {}
+        return False
+
+    def getUniqueStates(self):
+        return len(self.keys)
+    uniqueStates = property(getUniqueStates)
+
+    def stateKey(self, state):
+        data = state.data
+        food = data.food.data
+        entry = self.foodKeys.get(id(food))
+        if entry is None or entry[0] is not food:
+            # the list is kept with its key so that its id is not reused
+            entry = self.foodKeys[id(food)] = (food, b''.join(map(bytes, food)))
+        agents = tuple((agent.configuration.pos, agent.configuration.direction, agent.scaredTimer)
+                       for agent in data.agentStates)
+        return (agents, entry[1], tuple(data.capsules), data.score)
+
+    def recordSuccessor(self, state, successor):
+        self.successors += 1
+        if successor.data._win or successor.data._lose:
+            self.terminals += 1
+        if self.unique:
+            self.keys.add(self.stateKey(state))
+            self.keys.add(self.stateKey(successor))
+
+
 class GameState:
     """
     A GameState specifies the full game state, including the food, capsules,
@@ -80,12 +139,26 @@ class GameState:
     # static variable keeps track of which states have had getLegalActions called
     explored = set()
 
+    # the active ExplorationCounters; while there are any, explored is not updated
+    counters = []
+
     def getAndResetExplored():
         tmp = GameState.explored.copy()
         GameState.explored = set()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def countExploration(unique=True):
+        """
+        Returns an ExplorationCounter to use as a context manager:
+
+          with GameState.countExploration() as counter:
+              action = agent.getAction(state)
+          print(counter.successors, counter.uniqueStates)
+        """
+        return ExplorationCounter(unique)
+    countExploration = staticmethod(countExploration)
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -129,8 +202,12 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.counters:
+            for counter in GameState.counters:
+                counter.recordSuccessor(self, state)
+        else:
+            GameState.explored.add(self)
+            GameState.explored.add(state)
         return state
 
     def getLegalPacmanActions(self):
@@ -174,6 +251,9 @@ class GameState:
         return len(self.data.agentStates)
 
     def getScore(self):
+        if GameState.counters:
+            for counter in GameState.counters:
+                counter.evaluations += 1
         return float(self.data.score)
 
     def getCapsules(self):
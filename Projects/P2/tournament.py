@@ -0,0 +1,344 @@
+# tournament.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Plays every combination of Pacman agents, ghost types, layouts and seeds,
+and reports how each agent fared.
+
+An agent is given as in pacman.py, a name and optional arguments, and
+agents are separated by semicolons:
+
+> python tournament.py -p "ReflexAgent;AlphaBetaAgent:depth=2;ExpectimaxAgent:depth=2" \\
+      -g RandomGhost,DirectionalGhost -l smallClassic,mediumClassic -n 10 -w 4
+
+Games are played without graphics on a pool of worker processes (-w), and
+each result is appended to the checkpoint file (-c) as soon as its game
+ends.  Running the same command again skips the games already in the
+checkpoint, so an interrupted tournament resumes where it stopped; delete
+the file to start over.
+
+For each agent, and each agent, ghost and layout, the report gives the
+win rate with a 95% Wilson interval, the mean score with a 95% normal
+interval, score quartiles, and percentiles of the time the agent took per
+move.  Games the agent crashed or timed out in count as losses and are
+counted separately; they are left out of the score statistics.  Agents are
+also given Elo ratings from head to head comparisons of their scores in the
+same games, where failing a game loses to finishing it.  Only the games of the requested agents,
+ghosts, layouts and seeds are counted, whatever else the checkpoint holds.
+Game n of a combination is played with random seed n (offset by -s), so
+every agent faces the same ghost moves as far as its own moves allow.
+
+An agent loses a game by timing out if one move takes more than -t seconds,
+or, with --gameTimeout, if all its moves together take longer than that.
+"""
+
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import layout
+import pacman
+
+def parseAgent(spec):
+    "Returns (name, args) for an agent spec NAME or NAME:key=value,key=value."
+    name, _, args = spec.partition(':')
+    return name.strip(), pacman.parseAgentArgs(args or None)
+
+def gameKey(agent, ghost, layoutName, seed):
+    return '%s|%s|%s|%d' % (agent, ghost, layoutName, seed)
+
+class TournamentRules(pacman.ClassicGameRules):
+    """
+    ClassicGameRules with separate limits on the time an agent may take for
+    one move (and to start up) and for the whole game.  ClassicGameRules
+    uses its one timeout for both.
+    """
+    def __init__(self, moveTimeout=30, gameTimeout=None):
+        pacman.ClassicGameRules.__init__(self, moveTimeout)
+        self.gameTimeout = gameTimeout or float('inf')
+
+    def getMaxTotalTime(self, agentIndex):
+        return self.gameTimeout
+
+def playGame(task):
+    """
+    Plays one game and returns its result: the task's fields plus score,
+    win, moves, crash and timeout flags, and the seconds each Pacman move took.
+    timeout is the limit per move and gameTimeout (if set) the limit per game.
+    """
+    agentSpec, ghostName, layoutName, numGhosts, seed, timeout, gameTimeout = task
+    import textDisplay
+    random.seed(seed)
+    name, args = parseAgent(agentSpec)
+    agent = pacman.loadAgent(name, True)(**args)
+    ghostType = pacman.loadAgent(ghostName, True)
+    ghosts = [ghostType(i + 1) for i in range(numGhosts)]
+
+    moveTimes = []
+    getAction = agent.getAction
+
+    def timedGetAction(state):
+        start = time.time()
+        try:
+            return getAction(state)
+        except SystemExit:
+            # util.raiseNotDefined exits; count it as a crash, not the worker's end
+            raise Exception('Pacman agent exited')
+        finally:
+            moveTimes.append(time.time() - start)
+    agent.getAction = timedGetAction
+
+    rules = TournamentRules(timeout, gameTimeout)
+    game = rules.newGame(layout.getLayout(layoutName), agent, ghosts, textDisplay.NullGraphics(),
+                         True, catchExceptions=True)
+    game.run()
+    return {'agent': agentSpec, 'ghost': ghostName, 'layout': layoutName, 'seed': seed,
+            'score': game.state.getScore(), 'win': game.state.isWin(), 'moves': len(moveTimes),
+            'crashed': game.agentCrashed, 'timedOut': game.agentTimeout,
+            'moveTimes': [round(t, 6) for t in moveTimes]}
+
+def loadCheckpoint(path):
+    "Returns {gameKey: result} for the results in a checkpoint file, skipping a torn last line."
+    results = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue
+                results[gameKey(result['agent'], result['ghost'], result['layout'], result['seed'])] = result
+    return results
+
+def runTournament(agents, ghosts, layouts, numGames, numGhosts=4, seed=0, timeout=30,
+                  workers=1, checkpoint=None, gameTimeout=None):
+    """
+    Plays the games of the tournament that are not already in checkpoint,
+    appending each result to it, and returns all the results.
+    """
+    results = loadCheckpoint(checkpoint)
+    tasks = [(agent, ghost, layoutName, numGhosts, seed + n, timeout, gameTimeout)
+             for agent in agents for ghost in ghosts for layoutName in layouts for n in range(numGames)
+             if gameKey(agent, ghost, layoutName, seed + n) not in results]
+    if results:
+        print('Resuming: %d games done, %d to play' % (len(results), len(tasks)))
+
+    pool = None
+    if workers > 1 and len(tasks) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(workers, maxtasksperchild=20)
+        outcomes = pool.imap_unordered(playGame, tasks)
+    else:
+        outcomes = map(playGame, tasks)
+    out = open(checkpoint, 'a') if checkpoint else None
+    try:
+        for i, result in enumerate(outcomes):
+            results[gameKey(result['agent'], result['ghost'], result['layout'], result['seed'])] = result
+            if out:
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+            print('[%d/%d] %-40s %-16s %-16s seed %-4d %s %6.0f' %
+                  (i + 1, len(tasks), result['agent'], result['ghost'], result['layout'], result['seed'],
+                   'Win ' if result['win'] else 'Loss', result['score']))
+    finally:
+        if out:
+            out.close()
+        if pool is not None:
+            pool.terminate()
+    return results
+
+#########################
+# Statistics            #
+#########################
+
+def percentile(values, p):
+    "Returns the p-th percentile (0-100) of values, interpolating between ranks."
+    values = sorted(values)
+    if not values:
+        return None
+    rank = (len(values) - 1) * p / 100.0
+    low = int(math.floor(rank))
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+def wilsonInterval(successes, n, z=1.96):
+    "Returns the Wilson score interval for a binomial proportion."
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / float(n)
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+def meanInterval(values, z=1.96):
+    "Returns (mean, half width) of the normal-approximation interval for the mean of values."
+    n = len(values)
+    mean = sum(values) / float(n)
+    if n < 2:
+        return mean, float('inf')
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, z * math.sqrt(variance / n)
+
+def failed(result):
+    "Returns whether the Pacman agent crashed or timed out in a game."
+    return result['crashed'] or result['timedOut']
+
+def summarize(results):
+    """
+    Returns the statistics of a list of game results.  Failed games count as
+    losses but are left out of the score statistics, since the score a game
+    stopped at says nothing about the agent; those are None if every game
+    failed.
+    """
+    scores = [result['score'] for result in results if not failed(result)]
+    wins = len([result for result in results if result['win']])
+    moveTimes = [t for result in results for t in result['moveTimes']]
+    mean, halfWidth = meanInterval(scores) if scores else (None, None)
+    return {'games': len(results), 'wins': wins, 'winRate': wins / float(len(results)),
+            'winInterval': wilsonInterval(wins, len(results)),
+            'scoredGames': len(scores), 'meanScore': mean, 'scoreHalfWidth': halfWidth,
+            'scoreQuartiles': [percentile(scores, p) for p in [0, 25, 50, 75, 100]],
+            'moveMs': dict(('p%d' % p, 1000 * percentile(moveTimes, p) if moveTimes else None)
+                           for p in [50, 90, 99, 100]),
+            'crashes': len([result for result in results if result['crashed']]),
+            'timeouts': len([result for result in results if result['timedOut']])}
+
+def eloRatings(results, agents, k=16.0, start=1500.0):
+    """
+    Returns {agent: Elo rating}, treating every two agents' games on the same
+    ghost, layout and seed as a match won by the higher score.  An agent that
+    crashed or timed out loses to one that finished, and two that failed
+    draw.  Matches are rated in a fixed order, so the ratings depend only on
+    the results.
+    """
+    ratings = dict((agent, start) for agent in agents)
+    games = {}
+    for result in results.values():
+        if result['agent'] in ratings:
+            # Failed games rank below every finished one, whatever their score.
+            score = (0, 0) if failed(result) else (1, result['score'])
+            games.setdefault((result['ghost'], result['layout'], result['seed']), {})[result['agent']] = score
+    for key in sorted(games):
+        scores = games[key]
+        for i, first in enumerate(agents):
+            for second in agents[i + 1:]:
+                if first in scores and second in scores:
+                    outcome = 0.5 if scores[first] == scores[second] else float(scores[first] > scores[second])
+                    expected = 1 / (1 + 10 ** ((ratings[second] - ratings[first]) / 400.0))
+                    ratings[first] += k * (outcome - expected)
+                    ratings[second] -= k * (outcome - expected)
+    return ratings
+
+def selectResults(results, ghosts, layouts, seeds):
+    "Returns the results, by gameKey, of the games against ghosts on layouts with seeds."
+    ghosts, layouts, seeds = set(ghosts), set(layouts), set(seeds)
+    return dict((key, result) for key, result in results.items()
+                if result['ghost'] in ghosts and result['layout'] in layouts and result['seed'] in seeds)
+
+def report(results, agents, ghosts, layouts, seeds):
+    """
+    Returns the report lines: one per agent, ghost and layout, then one per
+    agent with its Elo rating.  Only games played with seeds are counted.
+    """
+    def line(label, stats):
+        low, high = stats['winInterval']
+        if stats['scoredGames']:
+            score = 'score %8.1f +- %-7.1f  q %s' % (stats['meanScore'], stats['scoreHalfWidth'],
+                                                    '/'.join('%.0f' % q for q in stats['scoreQuartiles']))
+        else:
+            score = 'score %-30s' % 'n/a (every game failed)'
+        return ('%-56s %4d  win %5.1f%% [%5.1f, %5.1f]  %s  move ms p50 %.1f p90 %.1f p99 %.1f%s' %
+                (label, stats['games'], 100 * stats['winRate'], 100 * low, 100 * high, score,
+                 stats['moveMs']['p50'] or 0, stats['moveMs']['p90'] or 0, stats['moveMs']['p99'] or 0,
+                 '  crashes %d timeouts %d' % (stats['crashes'], stats['timeouts'])
+                 if stats['crashes'] or stats['timeouts'] else ''))
+
+    selected = selectResults(results, ghosts, layouts, seeds)
+    lines = []
+    for agent in agents:
+        for ghost in ghosts:
+            for layoutName in layouts:
+                games = [result for result in selected.values()
+                         if (result['agent'], result['ghost'], result['layout']) == (agent, ghost, layoutName)]
+                if games:
+                    lines.append(line('%s vs %s on %s' % (agent, ghost, layoutName), summarize(games)))
+    lines.append('')
+    ratings = eloRatings(selected, agents)
+    for agent in agents:
+        games = [result for result in selected.values() if result['agent'] == agent]
+        if games:
+            lines.append(line(agent, summarize(games)) + '  Elo %.0f' % ratings[agent])
+    return lines
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python tournament.py <options>')
+    parser.add_option('-p', '--agents', dest='agents', default='ReflexAgent',
+                      help='semicolon separated Pacman agents, each NAME or NAME:key=value,...')
+    parser.add_option('-g', '--ghosts', dest='ghosts', default='RandomGhost',
+                      help='comma separated ghost agents')
+    parser.add_option('-l', '--layouts', dest='layouts', default='smallClassic',
+                      help='comma separated layouts')
+    parser.add_option('-n', '--numGames', dest='numGames', type='int', default=10,
+                      help='games per agent, ghost and layout')
+    parser.add_option('-k', '--numghosts', dest='numGhosts', type='int', default=4,
+                      help='the maximum number of ghosts')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0,
+                      help='the seed of the first game of each combination')
+    parser.add_option('-t', '--timeout', dest='timeout', type='int', default=30,
+                      help='seconds an agent may take per move')
+    parser.add_option('--gameTimeout', dest='gameTimeout', type='int', default=0,
+                      help='seconds an agent may take for all its moves in a game (0 for no limit)')
+    parser.add_option('-w', '--workers', dest='workers', type='int', default=1,
+                      help='worker processes to play games on')
+    parser.add_option('-c', '--checkpoint', dest='checkpoint', default='tournament.jsonl',
+                      help='file results are appended to and resumed from')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='write the statistics to this JSON file')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    agents = [spec.strip() for spec in options.agents.split(';') if spec.strip()]
+    ghosts = options.ghosts.split(',')
+    layouts = options.layouts.split(',')
+    for layoutName in layouts:
+        if layout.getLayout(layoutName) is None:
+            raise Exception('The layout ' + layoutName + ' cannot be found')
+    for name in [parseAgent(agent)[0] for agent in agents] + ghosts:
+        pacman.loadAgent(name, True)
+
+    results = runTournament(agents, ghosts, layouts, options.numGames, options.numGhosts, options.seed,
+                            options.timeout, options.workers, options.checkpoint, options.gameTimeout)
+    seeds = range(options.seed, options.seed + options.numGames)
+    print('')
+    for line in report(results, agents, ghosts, layouts, seeds):
+        print(line)
+    if options.output:
+        statistics = {}
+        selected = selectResults(results, ghosts, layouts, seeds)
+        ratings = eloRatings(selected, agents)
+        for agent in agents:
+            games = [result for result in selected.values() if result['agent'] == agent]
+            if games:
+                statistics[agent] = summarize(games)
+                statistics[agent]['elo'] = ratings[agent]
+        with open(options.output, 'w') as f:
+            json.dump(statistics, f, indent=2, sort_keys=True)
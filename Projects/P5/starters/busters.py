@@ -473,6 +473,8 @@ def readCommand( argv ):
                       help='Renders the ghosts in the display (cheating)', default=False)
     parser.add_option('-t', '--frameTime', dest='frameTime', type='float',
                       help=default('Time to delay between frames; <0 means keyboard'), default=0.1)
+    parser.add_option('--distanceCache', dest='distanceCache',
+                      help='Directory in which to cache maze distances between runs (off by default)', default=None)
 
     options, otherjunk = parser.parse_args()
     if len(otherjunk) != 0:
@@ -482,6 +484,11 @@ def readCommand( argv ):
     # Fix the random seed
     if options.fixRandomSeed: random.seed('bustersPacman')
 
+    # Share maze distances with later runs
+    if options.distanceCache:
+        import distanceCalculator
+        distanceCalculator.DISTANCE_CACHE_DIR = options.distanceCache
+
     # Choose a layout
     args['layout'] = layout.getLayout( options.layout )
     if args['layout'] == None: raise Exception("The layout " + options.layout + " cannot be found")
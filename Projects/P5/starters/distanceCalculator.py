@@ -24,43 +24,70 @@ distancer.getDistance( (1,1), (10,10) )
 
 The Distancer object also serves as an example of sharing data
 safely among agents via a global dictionary (distanceMap),
-and performing asynchronous computation via threads. These
+and performing asynchronous computation with futures: every
+Distancer for the same layout waits on one shared computation,
+run on a daemon thread (see requestDistances). These
 examples may help you in designing your own objects, but you
 shouldn't need to modify the Distancer code in order to use its
 distances.
 """
 
-import threading, sys, time, random
+import threading, sys, time, random, operator
+import concurrent.futures
+import hashlib, mmap, os, struct, tempfile
+from array import array
 
 class Distancer:
-  def __init__(self, layout, background=True, default=10000):
+  def __init__(self, layout, background=True, default=10000, exact=False):
     """
     Initialize with Distancer(layout).  Changing default is unnecessary.
 
     This will start computing maze distances in the background and use them
-    as soon as they are ready.  In the meantime, it returns manhattan distance.
+    as soon as they are ready.  In the meantime, it returns manhattan distance,
+    unless exact is set, in which case getDistance waits for maze distances.
 
     To compute all maze distances on initialization, set background=False
     """
     self._distances = None
     self.default = default
+    self.exact = exact
+    self.walls = layout.walls
 
-    # Start computing distances in the background; when the dc finishes,
-    # it will fill in self._distances for us.
-    dc = DistanceCalculator()
-    dc.setAttr(layout, self)
-    dc.setDaemon(True)
-    if background:
-      dc.start()
-    else:
-      dc.run()
+    # All Distancers for the same walls share one computation (see requestDistances)
+    self.future = requestDistances(layout)
+    if not background:
+      self.wait()
 
-  def getDistance(self, pos1, pos2):
+  def wait(self, timeout=None):
+    """
+    Waits up to timeout seconds (forever if None) for the maze distances and
+    returns whether they are ready.  Errors in computing them are raised here.
+    """
+    if self._distances is None:
+      try:
+        self._distances = self.future.result(timeout)
+      except concurrent.futures.TimeoutError:
+        return False
+    return True
+
+  def getProgress(self):
+    "Returns the fraction of the maze distances computed so far."
+    if self._distances is not None:
+      return 1.0
+    return getDistanceProgress(self.walls)
+
+  def getDistance(self, pos1, pos2, exact=None):
     """
     The getDistance function is the only one you'll need after you create the object.
+
+    With exact=True (or exact set on the Distancer) this waits for maze
+    distances rather than falling back to manhattan distance.
     """
-    if self._distances == None:
-      return manhattanDistance(pos1, pos2)
+    if self._distances is None:
+      if exact or (exact is None and self.exact) or self.future.done():
+        self.wait()
+      else:
+        return manhattanDistance(pos1, pos2)
     if isInt(pos1) and isInt(pos2):
       return self.getDistanceOnGrid(pos1, pos2)
     pos1Grids = getGrids2D(pos1)
@@ -75,14 +102,13 @@ class Distancer:
     return bestDistance
 
   def getDistanceOnGrid(self, pos1, pos2):
-    key = (pos1, pos2)
-    if key in self._distances:
-      return self._distances[key]
-    else:
-      raise Exception("Positions not in grid: " + str(key))
+    distance = self._distances.getDistance(pos1, pos2)
+    if distance is None:
+      raise Exception("Positions not in grid: " + str((pos1, pos2)))
+    return distance
 
   def isReadyForMazeDistance(self):
-    return self._distances != None
+    return self._distances is not None or self.future.done()
 
 def manhattanDistance(x, y ):
   return abs( x[0] - y[0] ) + abs( x[1] - y[1] )
@@ -108,85 +134,260 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
+# Finished distances, and the futures of all computations, by walls
 distanceMap = {}
-distanceMapSemaphore = threading.Semaphore(1)
-distanceThread = None
+distanceFutures = {}
+distanceProgress = {}
+distanceLock = threading.Lock()
+# At most DISTANCE_WORKERS computations run at once, each on a daemon
+# thread so that an unfinished one never holds up interpreter exit.
+DISTANCE_WORKERS = 2
+distanceSlots = threading.Semaphore(DISTANCE_WORKERS)
+
+def requestDistances(layout):
+  """
+  Returns a concurrent.futures.Future for the DistanceMatrix of the layout's
+  walls.  The distances of a layout are computed only once: later requests,
+  from any thread, get the same future.
+  """
+  walls = layout.walls
+  with distanceLock:
+    future = distanceFutures.get(walls)
+    if future is None or (future.done() and future.exception() is not None):
+      if walls in distanceMap:
+        future = concurrent.futures.Future()
+        future.set_result(distanceMap[walls])
+      else:
+        distanceProgress[walls] = 0.0
+        future = concurrent.futures.Future()
+        thread = threading.Thread(target=_runComputation, args=(future, layout))
+        thread.daemon = True
+        thread.start()
+      distanceFutures[walls] = future
+  return future
+
+def getDistanceProgress(walls):
+  "Returns the fraction of the maze distances for walls computed so far."
+  if walls in distanceMap:
+    return 1.0
+  return distanceProgress.get(walls, 0.0)
+
+def _runComputation(future, layout):
+  with distanceSlots:
+    if not future.set_running_or_notify_cancel():
+      return
+    try:
+      future.set_result(_computeAndShare(layout))
+    except BaseException as e:
+      future.set_exception(e)
+
+def _computeAndShare(layout):
+  def progress(done, total):
+    distanceProgress[layout.walls] = float(done) / total
+  distances = computeDistances(layout, progress)
+  #TODO:for oj
+  # print('[Distancer]: Switching to maze distances',file=sys.stdout)
+  with distanceLock:
+    distanceMap[layout.walls] = distances
+    distanceProgress.pop(layout.walls, None)
+  return distances
 
 def waitOnDistanceCalculator(t):
-  global distanceThread
-  if distanceThread != None:
+  "Sleeps for t seconds if any maze distances are still being computed."
+  with distanceLock:
+    pending = [future for future in distanceFutures.values() if not future.done()]
+  if pending:
     time.sleep(t)
 
-class DistanceCalculator(threading.Thread):
-  def setAttr(self, layout, distancer, default = 10000):
-    self.layout = layout
-    self.distancer = distancer
-    self.default = default
+UNREACHABLE = 0xFFFF
+UNREACHABLE_DISTANCE = 1000000000
+
+class DistanceMatrix:
+  """
+  The maze distances between every pair of open cells of a layout, in a
+  dense matrix of unsigned 16-bit ints.  Open cells are numbered in
+  walls.asList(False) order, and the distance between cells i and j is
+  entry i * size + j, or UNREACHABLE if they are not connected.
 
-  def run(self):
-    global distanceMap, distanceThread
-    distanceMapSemaphore.acquire()
+  For a layout with n open cells this takes 2 n^2 bytes, where a dictionary
+  keyed by pairs of positions takes well over a hundred bytes per pair.
+  """
+  def __init__(self, walls, distances=None, progress=None):
+    self.width, self.height = walls.width, walls.height
+    self.cells = walls.asList(False)
+    self.size = len(self.cells)
+    if self.size >= UNREACHABLE:
+      raise Exception('Too many open cells for 16-bit distances: %d' % self.size)
+    self.cellIds = array('i', [-1]) * (self.width * self.height)
+    for i, (x, y) in enumerate(self.cells):
+      self.cellIds[x * self.height + y] = i
+    if distances is None:
+      distances = self.computeDistances(walls, progress)
+    self.distances = distances
 
-    if self.layout.walls not in distanceMap:
-      if distanceThread != None: raise Exception('Multiple distance threads')
-      distanceThread = self
+  def cellId(self, pos):
+    "Returns the number of the open cell at pos, or -1 for walls and positions off the board."
+    x, y = int(pos[0]), int(pos[1])
+    if 0 <= x < self.width and 0 <= y < self.height:
+      return self.cellIds[x * self.height + y]
+    return -1
 
-      distances = computeDistances(self.layout)
-      #TODO:for oj
-      # print('[Distancer]: Switching to maze distances',file=sys.stdout)
+  def getDistance(self, pos1, pos2):
+    "Returns the maze distance between two open cells, or None if either is not one."
+    i, j = self.cellId(pos1), self.cellId(pos2)
+    if i < 0 or j < 0:
+      return None
+    distance = self.distances[i * self.size + j]
+    if distance == UNREACHABLE:
+      return UNREACHABLE_DISTANCE
+    return distance
 
-      distanceMap[self.layout.walls] = distances
-      distanceThread = None
+  def computeDistances(self, walls, progress=None):
+    """
+    Runs a breadth first search from every open cell.  A set of cells is
+    held as one int with bit x * height + y for cell (x, y), so a whole BFS
+    layer is expanded with a few shifts and masks.  Each bit of the
+    distances is then collected as a mask and spread into one byte per cell
+    with str and bytes methods, so no Python code runs per pair of cells.
+
+    progress, if given, is called with (sources done, size) as work proceeds.
+    """
+    width, height, size = self.width, self.height, self.size
+    area = width * height
+    openCells = 0
+    for x, y in self.cells:
+      openCells |= 1 << (x * height + y)
+    topRow = int(('1' + '0' * (height - 1)) * width, 2)
+    northOk, southOk = openCells & ~topRow, openCells & ~(topRow >> (height - 1))
+    indices = [x * height + y for x, y in self.cells]
+    if size > 1:
+      pickOpen = operator.itemgetter(*indices)
     else:
-      distances = distanceMap[self.layout.walls]
-
-    distanceMapSemaphore.release()
-    self.distancer._distances = distances
-
-def computeDistances(layout):
-    distances = {}
-    allNodes = layout.walls.asList(False)
-    for source in allNodes:
-        dist = {}
-        closed = {}
-        for node in allNodes:
-            dist[node] = 1000000000
-        import util
-        queue = util.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
-            if not layout.isWall((x,y+1)):
-                adjacent.append((x,y+1))
-            if not layout.isWall((x,y-1)):
-                adjacent.append((x,y-1) )
-            if not layout.isWall((x+1,y)):
-                adjacent.append((x+1,y) )
-            if not layout.isWall((x-1,y)):
-                adjacent.append((x-1,y))
-            for other in adjacent:
-                if not other in dist:
-                    continue
-                oldDist = dist[other]
-                newDist = nodeDist+1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+      pickOpen = lambda row: [row[i] for i in indices]
+    bitFormat = '0%db' % area
+    spread = [bytes.maketrans(b'01', bytes([0, 1 << k])) for k in range(8)]
+    spreadAll = bytes.maketrans(b'01', b'\x00\xff')
+
+    def spreadBits(plane, k):
+      # One byte per cell, with bit k set for the cells in plane
+      return int.from_bytes(format(plane, bitFormat).encode().translate(spread[k]), 'big')
+
+    distances = array('H', [UNREACHABLE]) * (size * size)
+    row = bytearray(2 * area)
+    for source, (x, y) in enumerate(self.cells):
+      frontier = 1 << (x * height + y)
+      unseen = openCells ^ frontier
+      reached = [frontier]  # reached[d]: the cells at most d steps from source
+      while frontier:
+        frontier = ((frontier & northOk) << 1 | (frontier & southOk) >> 1 |
+                    frontier << height | frontier >> height) & unseen
+        unseen ^= frontier
+        reached.append(reached[-1] | frontier)
+
+      # Bit k of a distance is set in runs of 2^k distances starting at odd
+      # multiples of 2^k, and the cells of a run are a difference of reached.
+      unreachable = int.from_bytes(format(unseen, bitFormat).encode().translate(spreadAll), 'big')
+      low, high = unreachable, unreachable
+      step, k, last = 1, 0, len(reached) - 1
+      while step <= last:
+        plane = 0
+        for start in range(step, last + 1, 2 * step):
+          plane |= reached[min(start + step - 1, last)] ^ reached[start - 1]
+        if k < 8:
+          low |= spreadBits(plane, k)
+        else:
+          high |= spreadBits(plane, k - 8)
+        step, k = 2 * step, k + 1
+
+      # Interleave the low and high bytes into little endian 16-bit distances
+      row[0::2] = low.to_bytes(area, 'little')
+      row[1::2] = high.to_bytes(area, 'little')
+      cellDistances = array('H', row)
+      if sys.byteorder == 'big':
+        cellDistances.byteswap()
+      distances[source * size:(source + 1) * size] = array('H', pickOpen(cellDistances))
+      if progress is not None and source % 64 == 63:
+        progress(source + 1, size)
     return distances
 
+def computeDistances(layout, progress=None):
+    """
+    Returns the DistanceMatrix of a layout's walls.  If DISTANCE_CACHE_DIR
+    is set, it is read from the distance cache when an earlier run (in any
+    process) has stored it there, and stored there otherwise.
+    """
+    if DISTANCE_CACHE_DIR is None:
+      return DistanceMatrix(layout.walls, progress=progress)
+    distances = loadCachedDistances(layout.walls)
+    if distances is None:
+      distances = DistanceMatrix(layout.walls, progress=progress)
+      saveCachedDistances(distances, layout.walls)
+    return distances
+
+#############################
+# PERSISTENT DISTANCE CACHE #
+#############################
+
+# When set, distance matrices are kept in this directory, one file per wall
+# layout, as a header and the little endian matrix.  Files are mapped read
+# only, so processes using the same layout share one copy in the page cache.
+# The cache is off (None) unless a caller opts in, e.g. with busters.py
+# --distanceCache; a relative directory is taken from the working directory.
+DISTANCE_CACHE_DIR = None
+DISTANCE_CACHE_MAGIC = b'DMAT'
+
+def distanceCacheFile(walls, directory=None):
+  "Returns the path of the cached distances for walls, named by a hash of the walls."
+  digest = hashlib.sha1(('%d %d\n' % (walls.width, walls.height) + str(walls)).encode()).hexdigest()
+  return os.path.join(directory or DISTANCE_CACHE_DIR, 'distances-%s.bin' % digest[:20])
+
+def loadCachedDistances(walls, directory=None):
+  """
+  Returns the cached DistanceMatrix of walls, backed by a read only memory
+  map of the cache file, or None if there is no valid cache file.
+  """
+  path = distanceCacheFile(walls, directory)
+  try:
+    with open(path, 'rb') as f:
+      mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+  except (IOError, OSError, ValueError):
+    return None
+  size = len(walls.asList(False))
+  if mapping[:4] != DISTANCE_CACHE_MAGIC or struct.unpack('<I', mapping[4:8])[0] != size or \
+     len(mapping) != 8 + 2 * size * size:
+    mapping.close()
+    return None
+  if sys.byteorder == 'little':
+    distances = memoryview(mapping)[8:].cast('H')
+  else:
+    distances = array('H', mapping[8:])
+    distances.byteswap()
+    mapping.close()
+  matrix = DistanceMatrix(walls, distances)
+  matrix.mapping = mapping  # Keeps the map open for as long as the matrix is used
+  return matrix
+
+def saveCachedDistances(matrix, walls, directory=None):
+  "Writes matrix to the cache, replacing the file atomically; failures are ignored."
+  path = distanceCacheFile(walls, directory)
+  distances = array('H', matrix.distances)
+  if sys.byteorder == 'big':
+    distances.byteswap()
+  try:
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(handle, 'wb') as f:
+      f.write(DISTANCE_CACHE_MAGIC + struct.pack('<I', matrix.size))
+      distances.tofile(f)
+    os.replace(temporary, path)
+  except (IOError, OSError):
+    pass
+
 
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-      return distances[key]
+    distance = distances.getDistance(pos1, pos2)
+    if distance is not None:
+      return distance
     return 100000
 